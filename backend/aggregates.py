@@ -0,0 +1,221 @@
+"""Materialized counts for /api/stats.
+
+The crud write paths keep these aggregates up to date in the same
+transaction as the change they count:
+
+  events.available_seats         total_seats - registrations of the event
+  users.registrations_count      registrations of the user (live events)
+  users.events_count             events the user organizes
+  event_type_stats               events and registrations per event type
+
+Reading them is a primary key lookup (per user) or one small table scan
+(per type), whatever the number of registrations.
+
+Counter updates never change users.updated_at, because that column is
+the ETag version of profiles and event organizers. Registrations whose
+event was deleted do not count.
+
+check_aggregates recomputes everything from the base tables and, with
+repair=True, rewrites the counters that drifted. Every fix is a single
+statement per table, so it is safe to run next to live traffic, but a
+write that commits while the fix runs can leave that one counter off by
+one. Running the check again shows if that happened. From the backend
+directory:
+
+    python aggregates.py            # report drift
+    python aggregates.py --repair   # report and fix
+"""
+from sqlalchemy import select, update, delete, insert, func, exists
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import User, Event, Registration, EventTypeStats
+from logging_config import logger
+
+
+def user_registrations(user_ids, delta: int):
+    """Add delta to registrations_count of one user id or a list of ids"""
+    if isinstance(user_ids, int):
+        condition = User.id == user_ids
+    else:
+        condition = User.id.in_(user_ids)
+    return (
+        update(User).where(condition)
+        .values(registrations_count=func.coalesce(User.registrations_count, 0) + delta,
+                updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def event_registered_users(event_id: int):
+    """Users registered for an event, for decrementing their counts"""
+    return select(Registration.user_id).where(
+        Registration.event_id == event_id, Registration.user_id.isnot(None))
+
+
+def user_events(user_id: int, delta: int):
+    """Add delta to events_count of the organizer"""
+    return (
+        update(User).where(User.id == user_id)
+        .values(events_count=func.coalesce(User.events_count, 0) + delta,
+                updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def type_counts(dialect: str, event_type: str, events: int = 0, registrations: int = 0):
+    """Add to the totals of event_type, creating its row if needed"""
+    dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+    stmt = dialect_insert(EventTypeStats).values(
+        event_type=event_type, events_count=events, registrations_count=registrations)
+    return stmt.on_conflict_do_update(
+        index_elements=[EventTypeStats.event_type],
+        set_={
+            "events_count": EventTypeStats.events_count + stmt.excluded.events_count,
+            "registrations_count":
+                EventTypeStats.registrations_count + stmt.excluded.registrations_count,
+        }
+    )
+
+
+def type_registrations(event_id: int, delta: int):
+    """Add delta to the registration total of the event's type"""
+    event_type = select(Event.event_type).where(Event.id == event_id).scalar_subquery()
+    return (
+        update(EventTypeStats)
+        .where(EventTypeStats.event_type == event_type)
+        .values(registrations_count=EventTypeStats.registrations_count + delta)
+    )
+
+
+def type_event_removed(event_id: int):
+    """Take the event and its registrations off its type's totals.
+
+    The registrations are counted inside the UPDATE, so the decrement
+    matches the rows the delete removes even when a registration
+    commits between the caller's reads and this statement.
+    """
+    event_type = select(Event.event_type).where(Event.id == event_id).scalar_subquery()
+    registered = (
+        select(func.count(Registration.id))
+        .where(Registration.event_id == event_id).scalar_subquery()
+    )
+    return (
+        update(EventTypeStats)
+        .where(EventTypeStats.event_type == event_type)
+        .values(events_count=EventTypeStats.events_count - 1,
+                registrations_count=EventTypeStats.registrations_count - registered)
+    )
+
+
+def stats_statement():
+    """Per type totals, largest types first"""
+    return select(EventTypeStats).order_by(
+        EventTypeStats.events_count.desc(), EventTypeStats.event_type)
+
+
+def user_stats_statement(user_id: int):
+    """Counts of one user"""
+    return select(User.registrations_count, User.events_count).where(User.id == user_id)
+
+# ===== CONSISTENCY CHECK =====
+
+
+def _registrations_per_event():
+    return (select(func.count(Registration.id))
+            .where(Registration.event_id == Event.id).scalar_subquery())
+
+
+def _registrations_per_user():
+    return (select(func.count(Registration.id))
+            .join(Event, Event.id == Registration.event_id)
+            .where(Registration.user_id == User.id).scalar_subquery())
+
+
+def _events_per_user():
+    return (select(func.count(Event.id))
+            .where(Event.organizer_id == User.id).scalar_subquery())
+
+
+def _type_totals():
+    registered = (select(Registration.event_id, func.count(Registration.id).label("n"))
+                  .group_by(Registration.event_id).subquery())
+    return (
+        select(Event.event_type, func.count(Event.id),
+               func.coalesce(func.sum(registered.c.n), 0))
+        .outerjoin(registered, registered.c.event_id == Event.id)
+        .group_by(Event.event_type)
+    )
+
+
+def check_aggregates(bind, repair: bool = False):
+    """Compare the aggregates with the base tables; fix them if repair.
+
+    Returns {aggregate: number of drifted rows} (before any repair).
+    """
+    seats = Event.total_seats - _registrations_per_event()
+    regs_drifted = func.coalesce(User.registrations_count, -1) != _registrations_per_user()
+    events_drifted = func.coalesce(User.events_count, -1) != _events_per_user()
+
+    with bind.begin() as conn:
+        drift = {
+            "event_seats": conn.scalar(
+                select(func.count(Event.id)).where(Event.available_seats != seats)),
+            "user_registrations": conn.scalar(
+                select(func.count(User.id)).where(regs_drifted)),
+            "user_events": conn.scalar(select(func.count(User.id)).where(events_drifted)),
+        }
+        expected = {t: (e, r) for t, e, r in conn.execute(_type_totals())}
+        stored = {row.event_type: (row.events_count, row.registrations_count)
+                  for row in conn.execute(select(EventTypeStats))}
+        drift["event_types"] = sum(
+            1 for t in expected.keys() | stored.keys()
+            if expected.get(t, (0, 0)) != stored.get(t, (0, 0)))
+
+        if repair and any(drift.values()):
+            if drift["event_seats"]:
+                conn.execute(update(Event).where(Event.available_seats != seats)
+                             .values(available_seats=seats))
+            if drift["user_registrations"] or drift["user_events"]:
+                conn.execute(
+                    update(User).where(regs_drifted | events_drifted)
+                    .values(registrations_count=_registrations_per_user(),
+                            events_count=_events_per_user(),
+                            updated_at=User.updated_at))
+            if drift["event_types"]:
+                conn.execute(delete(EventTypeStats))
+                if expected:
+                    conn.execute(insert(EventTypeStats), [
+                        dict(event_type=t, events_count=e, registrations_count=r)
+                        for t, (e, r) in expected.items()
+                    ])
+            logger.warning("Aggregates repaired: %s", drift)
+    return drift
+
+
+def ensure_aggregates(bind):
+    """Fill the aggregates of a database that predates them"""
+    with bind.connect() as conn:
+        missing = conn.scalar(select(
+            exists().where(User.registrations_count.is_(None))
+            | (exists().where(Event.id.isnot(None))
+               & ~exists().where(EventTypeStats.event_type.isnot(None)))
+        ))
+    if missing:
+        check_aggregates(bind, repair=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Check the materialized counts")
+    parser.add_argument("--repair", action="store_true", help="fix drifted counts")
+    args = parser.parse_args()
+
+    result = check_aggregates(engine, repair=args.repair)
+    for name, count in result.items():
+        print(f"{name:<20} {count} drifted")
+    if any(result.values()) and not args.repair:
+        sys.exit(1)
@@ -0,0 +1,704 @@
+"""Async counterparts of the crud functions, used by the API endpoints.
+
+AsyncSession cannot lazy-load relationships, so every query that feeds a
+response schema with nested objects eager-loads them explicitly. List
+queries return plain rows shaped for serialization.py instead of ORM
+objects. The sync functions in crud.py stay available for scripts and
+benchmarks.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, aliased
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+from collections import Counter
+from datetime import datetime
+from models import User, Event, Registration, WaitlistEntry
+from schemas import UserCreate, UserUpdate, EventCreate, EventUpdate
+from crud import (
+    ReservationStatus, events_page_statement, split_events_page, resize_event_statement
+)
+from logging_config import logger
+from search import search_terms, search_statement
+from passwords import hash_password_async
+from cache import invalidate_event, invalidate_event_pages, invalidate_all_events
+from serialization import USER_ROWS, EVENT_ROWS, REGISTRATION_ROWS, \
+    REGISTRATION_WITH_EVENT_ROWS
+from aggregates import (
+    user_registrations, user_events, event_registered_users,
+    type_counts, type_registrations, type_event_removed,
+    stats_statement, user_stats_statement
+)
+
+# Upper bound on ids per IN (...) and rows per flush in bulk operations
+BULK_CHUNK_SIZE = 500
+
+# ===== USER OPERATIONS =====
+
+
+async def create_user(db: AsyncSession, user: UserCreate):
+    """Create new user"""
+    db_user = User(
+        surname=user.surname,
+        name=user.name,
+        phone=user.phone,
+        email=user.email,
+        password=await hash_password_async(user.password)
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    logger.info("User created: %s %s", user.surname, user.name)
+    return db_user
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    """Get user by ID"""
+    return await db.get(User, user_id)
+
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    """Get user by email"""
+    return await db.scalar(select(User).where(User.email == email).limit(1))
+
+
+async def get_user_by_name(db: AsyncSession, surname: str, name: str):
+    """Get user by surname and name"""
+    return await db.scalar(
+        select(User).where(User.surname == surname, User.name == name).limit(1))
+
+
+def all_users_statement():
+    """USER_ROWS of all users"""
+    return USER_ROWS.select().order_by(User.id)
+
+
+async def update_user(db: AsyncSession, user_id: int, user_update: UserUpdate):
+    """Update user profile"""
+    db_user = await get_user_by_id(db, user_id)
+    if not db_user:
+        return None
+
+    update_data = user_update.model_dump(exclude_unset=True)
+    if update_data.get('password'):
+        update_data['password'] = await hash_password_async(update_data['password'])
+    for key, value in update_data.items():
+        setattr(db_user, key, value)
+
+    await db.commit()
+    await db.refresh(db_user)
+    logger.info("User profile updated: ID %s", user_id)
+    invalidate_all_events()
+    return db_user
+
+
+async def replace_password_hash(db: AsyncSession, user_id: int, old: str, new: str):
+    """Store a fresh hash unless the password was changed meanwhile"""
+    result = await db.execute(
+        update(User).where(User.id == user_id, User.password == old)
+        .values(password=new)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount:
+        logger.info("Password hash upgraded for user %s", user_id)
+
+
+async def revoke_sessions(db: AsyncSession, user_id: int):
+    """Invalidate every token issued to user so far"""
+    await db.execute(
+        update(User).where(User.id == user_id)
+        .values(token_version=func.coalesce(User.token_version, 0) + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    logger.info("Sessions revoked for user %s", user_id)
+
+
+async def delete_user(db: AsyncSession, user_id: int):
+    """Delete user"""
+    db_user = await get_user_by_id(db, user_id)
+    if not db_user:
+        return 0
+    await db.execute(delete(WaitlistEntry).where(WaitlistEntry.user_id == user_id))
+    await db.delete(db_user)
+    await db.commit()
+    logger.warning("User deleted: ID %s", user_id)
+    invalidate_all_events()
+    return 1
+
+# ===== EVENT OPERATIONS =====
+
+
+async def create_event(db: AsyncSession, event: EventCreate, organizer_id: int):
+    """Create new event"""
+    db_event = Event(
+        title=event.title,
+        description=event.description or "",
+        event_type=event.event_type,
+        event_date=event.event_date,
+        location=event.location,
+        total_seats=event.total_seats,
+        available_seats=event.total_seats,
+        organizer_id=organizer_id,
+        created_at=datetime.utcnow()
+    )
+    db.add(db_event)
+    await db.execute(user_events(organizer_id, 1))
+    await db.execute(type_counts(db.bind.dialect.name, event.event_type, events=1))
+    await db.commit()
+    logger.info("Event created: %s (%s)", event.title, event.event_type)
+    invalidate_event(db_event.id)
+    return await get_event_by_id(db, db_event.id)
+
+
+async def get_event_by_id(db: AsyncSession, event_id: int):
+    """Get event by ID"""
+    return await db.scalar(
+        select(Event).options(joinedload(Event.organizer))
+        .where(Event.id == event_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+async def get_event_organizer(db: AsyncSession, event_id: int):
+    """(organizer_id,) row of event, or None if missing"""
+    result = await db.execute(select(Event.organizer_id).where(Event.id == event_id))
+    return result.first()
+
+
+async def get_events_page(db: AsyncSession, limit: int, **filters):
+    """Get one page of EVENT_ROWS; see crud.get_events_page"""
+    stmt = events_page_statement(limit, base=EVENT_ROWS.select(), **filters)
+    events = (await db.execute(stmt)).all()
+    return split_events_page(events, limit)
+
+
+async def search_events(db: AsyncSession, query: str, limit: int, offset: int = 0):
+    """Full-text search returning EVENT_ROWS; see crud.search_events"""
+    terms = search_terms(query)
+    if not terms:
+        return [], None
+    stmt = search_statement(db.bind.dialect.name, terms, limit + 1, offset,
+                            base=EVENT_ROWS.select())
+    events = (await db.execute(stmt)).all()
+    if len(events) > limit:
+        return events[:limit], offset + limit
+    return events, None
+
+
+async def get_user_events(db: AsyncSession, user_id: int):
+    """EVENT_ROWS of the events organized by user"""
+    result = await db.execute(
+        EVENT_ROWS.select()
+        .where(Event.organizer_id == user_id).order_by(Event.event_date)
+    )
+    return result.all()
+
+
+async def get_seat_counts(db: AsyncSession, event_ids):
+    """{event_id: (available_seats, total_seats)} for the given events"""
+    result = await db.execute(
+        select(Event.id, Event.available_seats, Event.total_seats)
+        .where(Event.id.in_(event_ids))
+    )
+    return {event_id: (available, total) for event_id, available, total in result}
+
+
+async def get_user_events_version(db: AsyncSession, user_id: int):
+    """Version rows (event id, event and organizer updated_at) for ETags"""
+    result = await db.execute(
+        select(Event.id, Event.updated_at, User.updated_at)
+        .outerjoin(User, Event.organizer_id == User.id)
+        .where(Event.organizer_id == user_id).order_by(Event.event_date)
+    )
+    return result.all()
+
+
+async def update_event(db: AsyncSession, event_id: int, event_update: EventUpdate):
+    """Update event (same protocol as crud.update_event).
+
+    Raises ValueError if total_seats is below the number of registrations.
+    """
+    db_event = await get_event_by_id(db, event_id)
+    if not db_event:
+        return None
+
+    update_data = event_update.model_dump(exclude_unset=True)
+    total_seats = update_data.pop('total_seats', None)
+    old_type = db_event.event_type
+
+    if total_seats is not None and \
+            not (await db.execute(resize_event_statement(event_id, total_seats))).rowcount:
+        await db.rollback()
+        raise ValueError("total_seats is below the number of registrations")
+    for key, value in update_data.items():
+        setattr(db_event, key, value)
+    # Every write above holds the event row until commit
+    await db.flush()
+    await db.refresh(db_event)
+    registered = db_event.total_seats - db_event.available_seats
+
+    if db_event.event_type != old_type:
+        dialect = db.bind.dialect.name
+        await db.execute(type_counts(dialect, old_type, events=-1,
+                                     registrations=-registered))
+        await db.execute(type_counts(dialect, db_event.event_type, events=1,
+                                     registrations=registered))
+
+    if db_event.available_seats > 0 and total_seats is not None:
+        promoted = await _promote_waitlist(db, event_id, db_event.available_seats)
+        if promoted:
+            await db.execute(
+                update(Event).where(Event.id == event_id)
+                .values(available_seats=Event.available_seats - len(promoted))
+                .execution_options(synchronize_session=False))
+
+    await db.commit()
+    logger.info("Event updated: ID %s", event_id)
+    invalidate_event(event_id)
+    return await get_event_by_id(db, event_id)
+
+
+async def import_events(db: AsyncSession, items, organizer_id: int):
+    """Create events from an async iterator of (line, EventCreate or error).
+
+    Valid events are flushed in chunks and committed in one transaction at
+    the end; invalid lines are reported and skipped. Returns a list of
+    (line, event_id, error), or None if the organizer does not exist.
+    """
+    if not await get_user_by_id(db, organizer_id):
+        return None
+
+    results, batch, types = [], [], Counter()
+
+    async def flush():
+        await db.flush()
+        results.extend((line, db_event.id, None) for line, db_event in batch)
+        db.expunge_all()
+        batch.clear()
+
+    async for line, item in items:
+        if isinstance(item, str):
+            results.append((line, None, item))
+            continue
+        db_event = Event(
+            title=item.title,
+            description=item.description or "",
+            event_type=item.event_type,
+            event_date=item.event_date,
+            location=item.location,
+            total_seats=item.total_seats,
+            available_seats=item.total_seats,
+            organizer_id=organizer_id,
+            created_at=datetime.utcnow()
+        )
+        db.add(db_event)
+        batch.append((line, db_event))
+        types[item.event_type] += 1
+        if len(batch) >= BULK_CHUNK_SIZE:
+            await flush()
+    await flush()
+    if types:
+        await db.execute(user_events(organizer_id, sum(types.values())))
+        for event_type, count in types.items():
+            await db.execute(type_counts(db.bind.dialect.name, event_type, events=count))
+    await db.commit()
+    results.sort(key=lambda result: result[0])
+
+    created = sum(1 for _, event_id, _ in results if event_id)
+    logger.info("Imported %s events for organizer %s", created, organizer_id)
+    invalidate_event_pages()
+    return results
+
+
+async def delete_event(db: AsyncSession, event_id: int):
+    """Delete event"""
+    db_event = await db.get(Event, event_id)
+    if not db_event:
+        return 0
+    # Lock the event against seat reservations (Postgres); on SQLite the
+    # first write below takes the lock. The registrations are counted
+    # inside the UPDATEs, after the lock, not read beforehand.
+    await _lock_event(db, event_id)
+    await db.execute(type_event_removed(event_id))
+    await db.execute(user_registrations(event_registered_users(event_id), -1))
+    if db_event.organizer_id:
+        await db.execute(user_events(db_event.organizer_id, -1))
+    await db.execute(delete(WaitlistEntry).where(WaitlistEntry.event_id == event_id))
+    await db.delete(db_event)
+    await db.commit()
+    logger.warning("Event deleted: ID %s", event_id)
+    invalidate_event(event_id)
+    return 1
+
+# ===== REGISTRATION OPERATIONS =====
+
+
+async def reserve_seat(db: AsyncSession, user_id: int, event_id: int):
+    """Atomically claim a seat and register user for event.
+
+    Same protocol as crud.reserve_seat. Returns (ReservationStatus,
+    registration).
+    """
+    result = await db.execute(
+        update(Event)
+        .where(Event.id == event_id, Event.available_seats > 0)
+        .values(available_seats=Event.available_seats - 1)
+        .execution_options(synchronize_session=False)
+    )
+
+    if not result.rowcount:
+        await db.rollback()
+        exists = await db.scalar(select(Event.id).where(Event.id == event_id))
+        if not exists:
+            return ReservationStatus.EVENT_NOT_FOUND, None
+        return ReservationStatus.SOLD_OUT, None
+
+    registration = Registration(
+        user_id=user_id,
+        event_id=event_id,
+        registered_at=datetime.utcnow()
+    )
+    db.add(registration)
+    await db.execute(user_registrations(user_id, 1))
+    await db.execute(type_registrations(event_id, 1))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return ReservationStatus.DUPLICATE, None
+
+    logger.info("User %s registered for event %s", user_id, event_id)
+    invalidate_event(event_id)
+    return ReservationStatus.OK, registration
+
+
+async def _existing_ids(db: AsyncSession, column, ids, *criteria):
+    """Subset of ids present in column, queried in chunks"""
+    found = set()
+    for i in range(0, len(ids), BULK_CHUNK_SIZE):
+        result = await db.execute(
+            select(column).where(column.in_(ids[i:i + BULK_CHUNK_SIZE]), *criteria))
+        found.update(result.scalars())
+    return found
+
+
+async def _claim_seats(db: AsyncSession, event_id: int, wanted: int):
+    """Take up to wanted seats with one conditional UPDATE.
+
+    Returns the number of seats taken, or None if the event is missing.
+    Retries when a concurrent reservation changes the count in between.
+    """
+    while True:
+        available = await db.scalar(
+            select(Event.available_seats).where(Event.id == event_id))
+        if available is None:
+            return None
+        granted = min(available, wanted)
+        if granted <= 0:
+            return 0
+        result = await db.execute(
+            update(Event)
+            .where(Event.id == event_id, Event.available_seats >= granted)
+            .values(available_seats=Event.available_seats - granted)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return granted
+
+
+async def bulk_reserve_seats(db: AsyncSession, event_id: int, user_ids):
+    """Register many users for one event in a single transaction.
+
+    Unknown users and existing registrations are found with set-based
+    queries, seats for the rest are claimed with one UPDATE and the
+    registrations are inserted together. When seats run out, users earlier
+    in user_ids win. Returns (ReservationStatus, results) where results is
+    a list of (user_id, ReservationStatus, registration_id).
+    """
+    unique_ids = list(dict.fromkeys(user_ids))
+    while True:
+        known = await _existing_ids(db, User.id, unique_ids)
+        registered = await _existing_ids(
+            db, Registration.user_id, unique_ids, Registration.event_id == event_id)
+        candidates = [u for u in unique_ids if u in known and u not in registered]
+
+        granted = await _claim_seats(db, event_id, len(candidates))
+        if granted is None:
+            await db.rollback()
+            return ReservationStatus.EVENT_NOT_FOUND, []
+
+        now = datetime.utcnow()
+        registrations = {
+            u: Registration(user_id=u, event_id=event_id, registered_at=now)
+            for u in candidates[:granted]
+        }
+        db.add_all(registrations.values())
+        registered_ids = list(registrations)
+        for i in range(0, len(registered_ids), BULK_CHUNK_SIZE):
+            await db.execute(
+                user_registrations(registered_ids[i:i + BULK_CHUNK_SIZE], 1))
+        if registrations:
+            await db.execute(type_registrations(event_id, len(registrations)))
+        try:
+            await db.commit()
+            break
+        except IntegrityError:
+            # Someone registered one of these users meanwhile; start over
+            await db.rollback()
+
+    results, seen = [], set()
+    for u in user_ids:
+        if u in seen or u in registered:
+            status = ReservationStatus.DUPLICATE
+        elif u not in known:
+            status = ReservationStatus.USER_NOT_FOUND
+        elif u in registrations:
+            status = ReservationStatus.OK
+        else:
+            status = ReservationStatus.SOLD_OUT
+        seen.add(u)
+        registration = registrations.get(u) if status == ReservationStatus.OK else None
+        results.append((u, status, registration.id if registration else None))
+
+    logger.info("Bulk registration for event %s: %s of %s users registered",
+                event_id, len(registrations), len(user_ids))
+    if registrations:
+        invalidate_event(event_id)
+    return ReservationStatus.OK, results
+
+
+async def get_user_registrations(db: AsyncSession, user_id: int):
+    """REGISTRATION_WITH_EVENT_ROWS of a user, events and organizers
+    included, in one query"""
+    result = await db.execute(
+        REGISTRATION_WITH_EVENT_ROWS.select()
+        .where(Registration.user_id == user_id).order_by(Registration.id)
+    )
+    return result.all()
+
+
+async def get_user_registrations_version(db: AsyncSession, user_id: int):
+    """Version rows for a user's registrations, used for ETags.
+
+    Registrations are never updated in place (only created or deleted), so
+    their id is their version; the event and organizer contribute their
+    updated_at.
+    """
+    result = await db.execute(
+        select(Registration.id, Event.id, Event.updated_at, User.updated_at)
+        .join(Event, Registration.event_id == Event.id)
+        .outerjoin(User, Event.organizer_id == User.id)
+        .where(Registration.user_id == user_id).order_by(Registration.id)
+    )
+    return result.all()
+
+
+def event_registrations_statement(event_id: int):
+    """REGISTRATION_ROWS of all registrations for event"""
+    return (REGISTRATION_ROWS.select()
+            .where(Registration.event_id == event_id).order_by(Registration.id))
+
+
+async def get_registration_owners(db: AsyncSession, registration_id: int):
+    """(user_id, organizer_id) of registration and its event, or None if missing"""
+    result = await db.execute(
+        select(Registration.user_id, Event.organizer_id)
+        .outerjoin(Event, Registration.event_id == Event.id)
+        .where(Registration.id == registration_id)
+    )
+    return result.first()
+
+
+async def cancel_registration(db: AsyncSession, registration_id: int):
+    """Cancel registration and hand the seat to the head of the waitlist"""
+    registration = await db.get(Registration, registration_id)
+    if not registration:
+        return 0
+
+    event_id = registration.event_id
+    await _lock_event(db, event_id)
+
+    deleted = (await db.execute(
+        delete(Registration).where(Registration.id == registration_id)
+        .execution_options(synchronize_session=False)
+    )).rowcount
+    if not deleted:
+        await db.rollback()
+        return 0
+    db.expunge(registration)
+    if registration.user_id:
+        await db.execute(user_registrations(registration.user_id, -1))
+    await db.execute(type_registrations(event_id, -1))
+
+    if not await _promote_waitlist(db, event_id, 1):
+        await db.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .values(available_seats=Event.available_seats + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    await db.commit()
+    logger.info("Registration canceled: ID %s", registration_id)
+    invalidate_event(event_id)
+
+    return 1
+
+# ===== WAITLIST OPERATIONS =====
+# Same locking protocol as the waitlist functions in crud.py.
+
+
+async def _lock_event(db: AsyncSession, event_id: int):
+    """Lock the event row; returns its available_seats (None if missing)"""
+    return await db.scalar(
+        select(Event.available_seats).where(Event.id == event_id).with_for_update())
+
+
+async def _promote_waitlist(db: AsyncSession, event_id: int, seats: int):
+    """Move up to seats users from the head of the waitlist to registrations"""
+    promoted = []
+    while len(promoted) < seats:
+        head = await db.scalar(
+            select(WaitlistEntry).where(WaitlistEntry.event_id == event_id)
+            .order_by(WaitlistEntry.position).limit(1)
+        )
+        if head is None:
+            break
+        await db.delete(head)
+        await db.flush()
+        registered = await db.scalar(select(Registration.id).where(
+            Registration.user_id == head.user_id, Registration.event_id == event_id))
+        if registered:
+            continue
+        registration = Registration(
+            user_id=head.user_id,
+            event_id=event_id,
+            registered_at=datetime.utcnow()
+        )
+        db.add(registration)
+        await db.flush()
+        promoted.append(registration)
+        logger.info("User %s promoted from waitlist for event %s",
+                    head.user_id, event_id)
+    if promoted:
+        await db.execute(user_registrations([r.user_id for r in promoted], 1))
+        await db.execute(type_registrations(event_id, len(promoted)))
+    return promoted
+
+
+async def join_waitlist(db: AsyncSession, user_id: int, event_id: int):
+    """Queue user for a sold-out event; see crud.join_waitlist"""
+    while True:
+        if await _lock_event(db, event_id) is None:
+            await db.rollback()
+            return ReservationStatus.EVENT_NOT_FOUND, None
+        if await db.scalar(select(Registration.id).where(
+                Registration.user_id == user_id, Registration.event_id == event_id)):
+            await db.rollback()
+            return ReservationStatus.DUPLICATE, None
+        entry = await db.scalar(select(WaitlistEntry).where(
+            WaitlistEntry.user_id == user_id, WaitlistEntry.event_id == event_id))
+        if entry:
+            # commit rather than rollback: a rollback would expire entry
+            await db.commit()
+            return ReservationStatus.WAITLISTED, entry
+
+        last = await db.scalar(select(func.max(WaitlistEntry.position))
+                               .where(WaitlistEntry.event_id == event_id))
+        entry = WaitlistEntry(event_id=event_id, user_id=user_id,
+                              position=(last or 0) + 1, joined_at=datetime.utcnow())
+        db.add(entry)
+        try:
+            await db.flush()
+            break
+        except IntegrityError:
+            await db.rollback()
+
+    available = await db.scalar(
+        select(Event.available_seats).where(Event.id == event_id))
+    promoted = await _promote_waitlist(db, event_id, available) if available > 0 else []
+    if promoted:
+        await db.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .values(available_seats=Event.available_seats - len(promoted))
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+
+    if promoted:
+        invalidate_event(event_id)
+    for registration in promoted:
+        if registration.user_id == user_id:
+            return ReservationStatus.OK, registration
+    logger.info("User %s joined waitlist for event %s", user_id, event_id)
+    return ReservationStatus.WAITLISTED, entry
+
+
+async def get_waitlist_position(db: AsyncSession, entry: WaitlistEntry):
+    """1-based place of entry in its event's queue"""
+    return await db.scalar(select(func.count(WaitlistEntry.id)).where(
+        WaitlistEntry.event_id == entry.event_id,
+        WaitlistEntry.position <= entry.position))
+
+
+async def get_user_waitlist(db: AsyncSession, user_id: int):
+    """User's waitlist entries with their place in each queue"""
+    ahead = aliased(WaitlistEntry)
+    place = (
+        select(func.count(ahead.id))
+        .where(ahead.event_id == WaitlistEntry.event_id,
+               ahead.position <= WaitlistEntry.position)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(WaitlistEntry, place)
+        .where(WaitlistEntry.user_id == user_id).order_by(WaitlistEntry.joined_at)
+    )
+    return result.all()
+
+
+async def get_waitlist_entry_owners(db: AsyncSession, entry_id: int):
+    """(user_id, organizer_id) of waitlist entry and its event, or None if missing"""
+    result = await db.execute(
+        select(WaitlistEntry.user_id, Event.organizer_id)
+        .outerjoin(Event, WaitlistEntry.event_id == Event.id)
+        .where(WaitlistEntry.id == entry_id)
+    )
+    return result.first()
+
+
+async def leave_waitlist(db: AsyncSession, entry_id: int):
+    """Remove a waitlist entry"""
+    result = await db.execute(delete(WaitlistEntry).where(WaitlistEntry.id == entry_id))
+    await db.commit()
+    return result.rowcount
+
+# ===== STATS =====
+
+
+async def get_stats(db: AsyncSession):
+    """Per event type totals from event_type_stats"""
+    return (await db.execute(stats_statement())).scalars().all()
+
+
+async def get_user_stats(db: AsyncSession, user_id: int):
+    """(registrations, organized events) of user, or None if missing"""
+    row = (await db.execute(user_stats_statement(user_id))).first()
+    if row is None:
+        return None
+    return row.registrations_count or 0, row.events_count or 0
+
+# ===== DASHBOARD =====
+
+
+async def get_dashboard_profile(db: AsyncSession, user_id: int):
+    """USER_ROWS row of user followed by its registrations_count,
+    events_count and updated_at, or None if missing"""
+    result = await db.execute(
+        USER_ROWS.select()
+        .add_columns(User.registrations_count, User.events_count, User.updated_at)
+        .where(User.id == user_id)
+    )
+    return result.first()
@@ -0,0 +1,160 @@
+"""Load-test comparison of the sync and async request paths.
+
+"sync" mounts the hot read/write endpoints on sync crud functions with a
+blocking Session per request (the old threadpool model); "async" is the
+real app from main.py on AsyncSession. Both run in-process against the
+same database and are driven by httpx with many requests in flight.
+Requires httpx. Uses a scratch SQLite file unless DATABASE_URL is set;
+the tables of that database are dropped and reseeded, so only point it
+at a throwaway database. Run from the backend directory:
+
+    python -m benchmarks.async_load --requests 3000 --concurrency 500
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+# Point both engines at a scratch database before the app modules load
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/load.db")
+sys.path.insert(0, os.getcwd())
+os.chdir(_tmp)
+
+from fastapi import FastAPI, Depends, HTTPException  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+from database import Base, engine, SessionLocal, create_db_engine  # noqa: E402
+from models import User, Event  # noqa: E402
+from schemas import EventResponse, RegistrationCreate, RegistrationResponse  # noqa: E402
+from sessions import issue_token  # noqa: E402
+import crud  # noqa: E402
+import main  # noqa: E402
+
+
+def build_sync_app(pool_size):
+    # Each request keeps its pooled connection until the get_db teardown,
+    # which itself needs a threadpool slot. With more requests in flight
+    # than pooled connections, threads block on the pool while the
+    # teardowns that would free connections wait for threads, and requests
+    # stall until the pool timeout. Size the pool to the load for this run.
+    sync_engine = create_db_engine(os.environ["DATABASE_URL"],
+                                   pool_size=pool_size)
+    SyncSession = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+
+    def get_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.middleware("http")(main.add_process_time_header)
+
+    @app.get("/api/events/{event_id}", response_model=EventResponse)
+    def get_event(event_id: int, db: Session = Depends(get_db)):
+        db_event = crud.get_event_by_id(db, event_id)
+        if not db_event:
+            raise HTTPException(status_code=404, detail="Event not found")
+        return db_event
+
+    @app.get("/api/events", response_model=list[EventResponse])
+    def get_all_events(db: Session = Depends(get_db)):
+        return crud.get_events_page(db, 50)[0]
+
+    @app.post("/api/registrations", response_model=RegistrationResponse,
+              status_code=201)
+    def register_for_event(reg: RegistrationCreate, user_id: int,
+                           db: Session = Depends(get_db)):
+        result, registration = crud.reserve_seat(db, user_id, reg.event_id)
+        if registration is None:
+            raise HTTPException(status_code=409, detail=result.value)
+        return registration
+
+    return app
+
+
+def seed(users, events):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all([User(surname=f"U{i}", name="Load", password="x")
+                for i in range(users)])
+    db.flush()
+    now = datetime.utcnow()
+    db.add_all([
+        Event(title=f"Event {i}", event_type="meetup",
+              event_date=now + timedelta(hours=i), location="Hall",
+              total_seats=users, available_seats=users, organizer_id=1)
+        for i in range(events)
+    ])
+    db.commit()
+    db.close()
+
+
+async def drive(app, total, concurrency, users, events):
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    tokens = {user_id: issue_token(user_id) for user_id in range(1, users + 1)}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                if i % 10 == 0:
+                    # the sync app reads user_id, main.app the token
+                    user_id = i % users + 1
+                    await client.post(
+                        f"/api/registrations?user_id={user_id}",
+                        json={"event_id": i % events + 1},
+                        headers={"Authorization": f"Bearer {tokens[user_id]}"})
+                elif i % 10 < 4:
+                    await client.get("/api/events")
+                else:
+                    await client.get(f"/api/events/{i % events + 1}")
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.getLogger("innoevent").setLevel(logging.WARNING)
+
+    modes = {"sync": build_sync_app(args.concurrency), "async": main.app}
+    print(f"{args.requests} requests, {args.concurrency} in flight "
+          f"(60% detail, 30% listing, 10% registration)")
+    for name, app in modes.items():
+        seed(args.users, args.events)
+        r = asyncio.run(drive(app, args.requests, args.concurrency,
+                              args.users, args.events))
+        print(f"  {name:<6} {r['rps']:7.0f} req/s  "
+              f"p50 {r['p50']:7.1f} ms  p99 {r['p99']:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main_()
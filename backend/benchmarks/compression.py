@@ -0,0 +1,110 @@
+"""Bytes on the wire and CPU per response for each compression level.
+
+Seeds a scratch SQLite database, fetches real response bodies from the
+app in-process (uncompressed), and compresses each one with the
+encoders of compression.py at several gzip levels and brotli qualities.
+For each combination it reports the compressed size and the CPU time
+per response, to help choose GZIP_LEVEL / BROTLI_QUALITY. Brotli rows
+need the brotli package. Run from the backend directory:
+
+    python -m benchmarks.compression
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+_cwd = os.getcwd()
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/compression.db"
+os.environ["COMPRESSION_ENABLED"] = "false"
+sys.path.insert(0, _cwd)
+os.chdir(_tmp)
+
+from sqlalchemy import insert  # noqa: E402
+
+from database import engine  # noqa: E402
+from migrations import migrate  # noqa: E402
+from models import User, Event, Registration  # noqa: E402
+from compression import ENCODERS  # noqa: E402
+import main  # noqa: E402
+
+LEVELS = {"gzip": (1, 4, 6, 9), "br": (1, 4, 6, 11)}
+WORDS = ("python", "jazz", "data", "robotics", "chess", "design", "startup",
+         "meetup", "lecture", "concert", "workshop", "community", "night")
+BODIES = {
+    "event": "/api/events/1",
+    "events page (50)": "/api/events?limit=50",
+    "events page (200)": "/api/events?limit=200",
+    "user registrations (20)": "/api/registrations/user/1",
+}
+
+
+def seed():
+    migrate(engine)
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            dict(surname=f"Surname{i}", name=rng.choice(("Anna", "Ivan", "Olga", "Petr")),
+                 email=f"user{i}@innopolis.university", password="x", token_version=0)
+            for i in range(1, 101)
+        ])
+        conn.execute(insert(Event), [
+            dict(title=f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} #{i}",
+                 description=" ".join(rng.choices(WORDS, k=rng.randint(5, 30))),
+                 event_type=rng.choice(("meetup", "concert", "lecture")),
+                 event_date=now + timedelta(minutes=rng.randint(60, 500000)),
+                 location=f"Room {rng.randint(100, 500)}",
+                 total_seats=100, available_seats=rng.randint(0, 100),
+                 organizer_id=rng.randint(1, 100))
+            for i in range(1, 501)
+        ])
+        conn.execute(insert(Registration), [
+            dict(user_id=1, event_id=event_id) for event_id in range(1, 21)])
+
+
+async def fetch_bodies():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        return {name: (await client.get(url)).content for name, url in BODIES.items()}
+
+
+def cpu_per_call(fn, min_seconds=0.2):
+    calls = 0
+    start = time.process_time()
+    while time.process_time() - start < min_seconds:
+        fn()
+        calls += 1
+    return (time.process_time() - start) / calls
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    logging.getLogger("innoevent").setLevel(logging.WARNING)
+    seed()
+    bodies = asyncio.run(fetch_bodies())
+
+    for name, body in bodies.items():
+        print(f"{name}: {len(body)} bytes")
+        for encoding, encoder in ENCODERS.items():
+            for level in LEVELS[encoding]:
+                size = len(encoder(level).finish(body))
+                cpu = cpu_per_call(lambda: encoder(level).finish(body))
+                print(f"  {encoding:<4} {level:>2}  {size:>7} bytes  "
+                      f"{size / len(body):5.1%}  {cpu * 1e6:8.0f} us CPU")
+    if "br" not in ENCODERS:
+        print("(install the brotli package for br results)")
+
+
+if __name__ == "__main__":
+    run()
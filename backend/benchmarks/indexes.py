@@ -0,0 +1,124 @@
+"""Lookup latency before and after the lookup index migration.
+
+Seeds a scratch database with a schema from before migration 4 (the
+lookup indexes) and --registrations registrations. Times the crud
+lookups by event and by organizer, applies the migration with
+migrations.migrate and times them again. A user's registrations use the
+unique (user_id, event_id) index in both runs, for reference. Uses a
+scratch SQLite file unless DATABASE_URL is set; only point that at a
+throwaway database. Run from the backend directory:
+
+    python -m benchmarks.indexes --registrations 1000000
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_db_engine
+from models import User, Event, Registration
+from migrations import migrate
+import crud
+
+EVENTS_PER_USER = 10
+CHUNK = 50000
+
+
+def seed(engine, registrations):
+    users = max(1, registrations // EVENTS_PER_USER)
+    events = max(EVENTS_PER_USER, users // 10)
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            dict(surname=f"User{i}", name="Bench", password="x", token_version=0)
+            for i in range(1, users + 1)
+        ])
+        conn.execute(insert(Event), [
+            dict(title=f"Event {i}", event_type="meetup",
+                 event_date=now + timedelta(minutes=i), location="Hall",
+                 total_seats=1000, available_seats=1000,
+                 organizer_id=rng.randint(1, users))
+            for i in range(1, events + 1)
+        ])
+        rows = [
+            dict(user_id=user_id, event_id=event_id)
+            for user_id in range(1, users + 1)
+            for event_id in rng.sample(range(1, events + 1), EVENTS_PER_USER)
+        ]
+        for start in range(0, len(rows), CHUNK):
+            conn.execute(insert(Registration), rows[start:start + CHUNK])
+    return users, events, len(rows)
+
+
+def lookups(users, events):
+    rng = random.Random(1)
+    event_ids = [rng.randint(1, events) for _ in range(20)]
+    user_ids = [rng.randint(1, users) for _ in range(20)]
+    return {
+        "registrations of an event": lambda db: [
+            crud.get_event_registrations(db, i) for i in event_ids],
+        "events of an organizer": lambda db: [
+            crud.get_user_events(db, i) for i in user_ids],
+        "registrations of a user": lambda db: [
+            crud.get_user_registrations(db, i) for i in user_ids],
+    }
+
+
+def timed(Session, fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        db = Session()
+        start = time.perf_counter()
+        fn(db)
+        # 20 lookups per run
+        samples.append((time.perf_counter() - start) * 1000 / 20)
+        db.close()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--registrations", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger("innoevent").setLevel(logging.WARNING)
+
+    url = os.getenv("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/indexes.db")
+    engine = create_db_engine(url, echo=False)
+    Session = sessionmaker(bind=engine)
+    Base.metadata.drop_all(bind=engine)
+    # Version 1 builds the current models; drop what version 4 adds
+    migrate(engine, target=3)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_registrations_event_id"))
+        conn.execute(text("DROP INDEX ix_events_organizer_date"))
+
+    start = time.perf_counter()
+    users, events, registrations = seed(engine, args.registrations)
+    print(f"seeded {users} users, {events} events, {registrations} registrations "
+          f"in {time.perf_counter() - start:.1f} s ({engine.dialect.name})")
+
+    cases = lookups(users, events)
+    before = {name: timed(Session, fn, args.repeat) for name, fn in cases.items()}
+    start = time.perf_counter()
+    migrate(engine)
+    print(f"migration 4 (lookup indexes) took {time.perf_counter() - start:.1f} s")
+    after = {name: timed(Session, fn, args.repeat) for name, fn in cases.items()}
+
+    print(f"median ms per lookup, {args.repeat} runs of 20")
+    for name in cases:
+        print(f"  {name:<27} before {before[name]:9.2f}   after {after[name]:7.2f}   "
+              f"x{before[name] / after[name]:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Per-call logging overhead: synchronous file handlers vs queue pipeline.
+
+"before" reproduces the old setup (FileHandler + JSONFormatter on the
+calling thread, eager f-string messages); "after" is logging_config as
+shipped (QueueHandler + background batching writer, lazy arguments).
+Console output goes to /dev/null in both cases. Run from the backend
+directory:
+
+    python -m benchmarks.logging_overhead --calls 50000
+"""
+import argparse
+import atexit
+import logging
+import os
+import tempfile
+import time
+
+
+def bench(log, calls, lazy):
+    start = time.perf_counter()
+    for i in range(calls):
+        if lazy:
+            log.info("User %s registered for event %s", i, i % 100)
+        else:
+            log.info(f"User {i} registered for event {i % 100}")
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=50000)
+    args = parser.parse_args()
+
+    # logging_config writes into ./logs, keep the benchmark out of the tree
+    os.chdir(tempfile.mkdtemp())
+    import logging_config
+    devnull = open(os.devnull, "w")
+
+    before = logging.getLogger("bench.before")
+    before.setLevel(logging.DEBUG)
+    before.propagate = False
+    file_handler = logging.FileHandler("before.log")
+    file_handler.setFormatter(logging_config.JSONFormatter())
+    console_handler = logging.StreamHandler(devnull)
+    console_handler.setFormatter(logging_config.formatter)
+    before.addHandler(file_handler)
+    before.addHandler(console_handler)
+
+    logging_config.console_handler.setStream(devnull)
+    after = logging_config.logger
+
+    sync_us = bench(before, args.calls, lazy=False)
+    queued_us = bench(after, args.calls, lazy=True)
+
+    drain_start = time.perf_counter()
+    atexit.unregister(logging_config.listener.stop)
+    logging_config.listener.stop()
+    drain = time.perf_counter() - drain_start
+
+    print(f"calls:            {args.calls}")
+    print(f"before (sync):    {sync_us:.2f} us/call on request thread")
+    print(f"after (queued):   {queued_us:.2f} us/call on request thread")
+    print(f"speedup:          {sync_us / queued_us:.1f}x")
+    print(f"writer backlog:   drained in {drain * 1000:.0f} ms after the run")
+
+
+if __name__ == "__main__":
+    main()
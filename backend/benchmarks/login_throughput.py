@@ -0,0 +1,115 @@
+"""Login throughput at the configured scrypt cost.
+
+"inline" verifies passwords on the event loop (the naive switch to a
+KDF); "pool" is the real login path, which uses the bounded hashing
+pool from passwords.py. While the logins run, /health is polled to show
+how responsive the loop stays. Uses a scratch SQLite file. The cost and
+pool size come from the usual PASSWORD_* variables. Run from the backend
+directory:
+
+    python -m benchmarks.login_throughput --logins 400 --concurrency 64
+    PASSWORD_SCRYPT_N=32768 python -m benchmarks.login_throughput
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/login.db")
+sys.path.insert(0, os.getcwd())
+os.chdir(_tmp)
+
+from database import Base, engine, SessionLocal  # noqa: E402
+from models import User  # noqa: E402
+import passwords  # noqa: E402
+import main  # noqa: E402
+
+
+def seed(users):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    stored = passwords.hash_password("password123")
+    db = SessionLocal()
+    db.add_all([User(surname=f"U{i}", name="Login", email=f"u{i}@bench.local",
+                     password=stored) for i in range(users)])
+    db.commit()
+    db.close()
+
+
+async def inline_verify(password, stored):
+    return passwords.verify_password(password, stored)
+
+
+async def drive(total, concurrency, users):
+    transport = httpx.ASGITransport(app=main.app)
+    latencies, statuses, health = [], {}, []
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(i):
+            async with semaphore:
+                start = time.perf_counter()
+                r = await client.post("/api/auth/login", data={
+                    "email": f"u{i % users}@bench.local", "password": "password123"})
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+        async def poll_health():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                health.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.01)
+
+        poller = asyncio.create_task(poll_health())
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await poller
+    # Pooled connections belong to this event loop
+    await main.async_engine.dispose()
+
+    latencies.sort()
+    return {
+        "rate": statuses.get(200, 0) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "health": statistics.median(health) if health else float("nan"),
+        "statuses": statuses,
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger("innoevent").setLevel(logging.ERROR)
+    seed(args.users)
+
+    print(f"scrypt n={passwords.PASSWORD_SCRYPT_N} r={passwords.PASSWORD_SCRYPT_R} "
+          f"p={passwords.PASSWORD_SCRYPT_P}, {passwords.PASSWORD_HASH_WORKERS} workers, "
+          f"queue limit {passwords.PASSWORD_QUEUE_LIMIT}; "
+          f"{args.logins} logins, {args.concurrency} in flight")
+    pooled = main.verify_password_async
+    for name, verify in (("inline", inline_verify), ("pool", pooled)):
+        main.verify_password_async = verify
+        r = asyncio.run(drive(args.logins, args.concurrency, args.users))
+        print(f"  {name:<6} {r['rate']:7.1f} logins/s  p50 {r['p50']:7.1f} ms  "
+              f"p99 {r['p99']:7.1f} ms  /health p50 {r['health']:6.1f} ms  {r['statuses']}")
+    main.verify_password_async = pooled
+
+
+if __name__ == "__main__":
+    main_()
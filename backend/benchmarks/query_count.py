@@ -0,0 +1,155 @@
+"""Query-count regression check for the listing endpoints.
+
+Runs the async_crud calls and RowShape serialization of the registration
+and event listing endpoints (and the dashboard) the same way the
+endpoints do, against a scratch SQLite database. It asserts that each one
+runs its expected number of SQL statements, however many rows there
+are. Run from the backend directory:
+
+    python -m benchmarks.query_count
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+_cwd = os.getcwd()
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/query_count.db"
+sys.path.insert(0, _cwd)
+os.chdir(_tmp)
+
+from sqlalchemy import event  # noqa: E402
+
+from database import engine, async_engine, SessionLocal, AsyncSessionLocal  # noqa: E402
+from migrations import migrate  # noqa: E402
+from models import User, Event, Registration  # noqa: E402
+from serialization import (  # noqa: E402
+    EVENT_ROWS, REGISTRATION_ROWS, REGISTRATION_WITH_EVENT_ROWS,
+    stream_json_array, dashboard_json
+)
+import async_crud  # noqa: E402
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def seed(n):
+    """Create an attendee registered for n events with distinct organizers,
+    a host organizing n events and a popular event with n registrations"""
+    db = SessionLocal()
+    attendee = User(surname="Attendee", name=f"N{n}", password="x")
+    host = User(surname="Host", name=f"N{n}", password="x")
+    popular = Event(
+        title="Popular", event_type="concert",
+        event_date=datetime.utcnow(), location="Arena",
+        total_seats=n, available_seats=0, organizer=host
+    )
+    db.add_all([attendee, host, popular])
+    for i in range(n):
+        organizer = User(surname=f"Org{n}-{i}", name="Org", password="x")
+        ev = Event(
+            title=f"Event {i}",
+            event_type="meetup",
+            event_date=datetime.utcnow() + timedelta(days=i),
+            location="Hall",
+            total_seats=10,
+            available_seats=9,
+            organizer=organizer
+        )
+        db.add(Registration(user=attendee, event=ev))
+        db.add(Registration(user=organizer, event=popular))
+        db.add(Event(
+            title=f"Hosted {i}", event_type="meetup",
+            event_date=datetime.utcnow(), location="Hall",
+            total_seats=10, available_seats=10, organizer=host
+        ))
+    db.commit()
+    ids = {"attendee": attendee.id, "host": host.id, "event": popular.id}
+    db.close()
+    return ids
+
+
+# What each endpoint runs, minus the HTTP layer
+
+async def user_registrations(db, ids):
+    """GET /api/registrations/user/{id}"""
+    await async_crud.get_user_registrations_version(db, ids["attendee"])
+    rows = await async_crud.get_user_registrations(db, ids["attendee"])
+    return REGISTRATION_WITH_EVENT_ROWS.dumps(rows)
+
+
+async def event_registrations(db, ids):
+    """GET /api/registrations/event/{id} (streamed, own session)"""
+    stmt = async_crud.event_registrations_statement(ids["event"])
+    return b"".join([chunk async for chunk in stream_json_array(REGISTRATION_ROWS, stmt)])
+
+
+async def user_events(db, ids):
+    """GET /api/events/user/{id}"""
+    await async_crud.get_user_events_version(db, ids["host"])
+    rows = await async_crud.get_user_events(db, ids["host"])
+    return EVENT_ROWS.dumps(rows)
+
+
+async def dashboard(db, ids):
+    """GET /api/dashboard/{id}"""
+    user_id = ids["attendee"]
+    profile = await async_crud.get_dashboard_profile(db, user_id)
+    await async_crud.get_user_registrations_version(db, user_id)
+    await async_crud.get_user_events_version(db, user_id)
+    registrations = await async_crud.get_user_registrations(db, user_id)
+    events = await async_crud.get_user_events(db, user_id)
+    return dashboard_json(profile, registrations, events)
+
+
+# Endpoint -> SQL statements it must run at any row count
+CHECKS = {
+    user_registrations: 2,
+    event_registrations: 1,
+    user_events: 2,
+    dashboard: 5,
+}
+
+
+async def measure(counter, fn, ids):
+    async with AsyncSessionLocal() as db:
+        before = counter.count
+        await fn(db, ids)
+        return counter.count - before
+
+
+async def run(sizes):
+    counter = QueryCounter(async_engine.sync_engine)
+    seeded = {n: seed(n) for n in sizes}
+
+    failed = False
+    for fn, expected in CHECKS.items():
+        counts = [await measure(counter, fn, seeded[n]) for n in sizes]
+        ok = all(count == expected for count in counts)
+        failed |= not ok
+        print(f"{fn.__name__:<22} " + "  ".join(
+            f"n={n}: {c}" for n, c in zip(sizes, counts))
+            + ("" if ok else f"  <-- expected {expected}"))
+    await async_engine.dispose()
+    return failed
+
+
+def main():
+    logging.getLogger("innoevent").setLevel(logging.WARNING)
+    migrate(engine)
+    if asyncio.run(run([1, 10, 200])):
+        raise SystemExit("FAIL: unexpected query count")
+    print("OK: constant query count")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Concurrency stress test for seat reservation.
+
+Fires many parallel registrations at a single event and checks that the
+event is never oversold. Run from the backend directory:
+
+    python -m benchmarks.reservation_stress --users 2000 --seats 500
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import User, Event, Registration
+import crud
+
+
+def seed(Session, users, seats):
+    db = Session()
+    try:
+        db.add_all([
+            User(surname=f"User{i}", name="Bench", password="x")
+            for i in range(users)
+        ])
+        db.flush()
+        event = Event(
+            title="Hot concert",
+            event_type="concert",
+            event_date=datetime.utcnow() + timedelta(days=30),
+            location="Main hall",
+            total_seats=seats,
+            available_seats=seats,
+            organizer_id=1
+        )
+        db.add(event)
+        db.commit()
+        return event.id, [u.id for u in db.query(User.id).all()]
+    finally:
+        db.close()
+
+
+def attempt(Session, user_id, event_id):
+    db = Session()
+    try:
+        result, _ = crud.reserve_seat(db, user_id, event_id)
+        return result
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--seats", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--duplicates", type=int, default=2,
+                        help="attempts per user (>1 exercises duplicate path)")
+    args = parser.parse_args()
+
+    logging.getLogger("innoevent").setLevel(logging.WARNING)
+
+    path = os.path.join(tempfile.mkdtemp(), "stress.db")
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 60},
+        pool_size=args.workers
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    event_id, user_ids = seed(Session, args.users, args.seats)
+    attempts = [uid for uid in user_ids for _ in range(args.duplicates)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = Counter(pool.map(
+            lambda uid: attempt(Session, uid, event_id), attempts))
+    elapsed = time.perf_counter() - start
+
+    db = Session()
+    event = db.get(Event, event_id)
+    registered = db.query(Registration).filter(
+        Registration.event_id == event_id).count()
+    db.close()
+
+    ok = results[crud.ReservationStatus.OK]
+    print(f"attempts:        {len(attempts)}")
+    for status, count in sorted(results.items()):
+        print(f"  {status.value:<14} {count}")
+    print(f"registrations:   {registered} / {args.seats} seats")
+    print(f"available_seats: {event.available_seats}")
+    print(f"elapsed:         {elapsed:.2f}s")
+    print(f"throughput:      {len(attempts) / elapsed:.0f} attempts/s, "
+          f"{ok / elapsed:.0f} registrations/s")
+
+    assert registered <= args.seats, "oversold!"
+    assert registered == ok
+    assert event.available_seats == args.seats - registered
+    print("OK: no oversell")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Event search latency: full-text index vs fetching the table.
+
+"scan" is what the frontend did before /api/events/search: load every
+event and filter the rows in Python. "index" is crud.search_events on
+the FTS5 table. Uses a scratch SQLite file. Run from the backend
+directory:
+
+    python -m benchmarks.search --events 100000
+"""
+import argparse
+import logging
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, create_db_engine
+from models import User, Event
+from search import setup_search_index
+import crud
+
+WORDS = ("python", "jazz", "meetup", "hackathon", "lecture", "concert", "data",
+         "startup", "robotics", "chess", "yoga", "design", "cinema", "poetry")
+FILLER = [f"w{n}" for n in range(5000)]
+QUERIES = ("pyth", "jazz night", "robot", "data meet", "chess", "hack")
+
+
+def seed(engine, events):
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add(User(surname="Bench", name="Search", password="x"))
+    db.flush()
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    for start in range(0, events, 10000):
+        db.bulk_insert_mappings(Event, [
+            dict(title=" ".join(rng.sample(WORDS, 2)).title() + f" #{i}",
+                 description=" ".join([rng.choice(WORDS)] + rng.choices(FILLER, k=11)),
+                 event_type="meetup", event_date=now + timedelta(minutes=i),
+                 location=f"Room {rng.randint(100, 999)}",
+                 total_seats=50, available_seats=50, organizer_id=1)
+            for i in range(start, min(start + 10000, events))
+        ])
+    db.commit()
+    db.close()
+    return Session
+
+
+def scan(db, query):
+    terms = query.lower().split()
+    return [e for e in crud.get_all_events(db)
+            if all(any(t in (f or "").lower() for f in (e.title, e.description, e.location))
+                   for t in terms)]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger("innoevent").setLevel(logging.WARNING)
+
+    engine = create_db_engine(f"sqlite:///{tempfile.mkdtemp()}/search.db", echo=False)
+    Base.metadata.create_all(bind=engine)
+    setup_search_index(engine)
+    Session = seed(engine, args.events)
+
+    print(f"{args.events} events, median of {args.repeat} runs")
+    for query in QUERIES:
+        db = Session()
+        index_ms = timed(lambda: crud.search_events(db, query, 20), args.repeat)
+        scan_ms = timed(lambda: (db.expunge_all(), scan(db, query)), 1)
+        db.close()
+        print(f"  {query!r:<14} index {index_ms:8.2f} ms   scan {scan_ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
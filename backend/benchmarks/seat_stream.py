@@ -0,0 +1,123 @@
+"""Fan-out of live seat updates to many idle subscribers.
+
+Starts one uvicorn worker on a scratch SQLite database and opens
+--subscribers SSE streams on one event. It then makes --updates
+registrations and reports how long every subscriber took to receive each
+new count, along with the server's memory per open stream. Each stream
+needs a file descriptor on both ends, so raise `ulimit -n` for large
+runs.
+Run from the backend directory:
+
+    python -m benchmarks.seat_stream --subscribers 2000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+PORT = 8765
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+async def wait_for_server(client):
+    for _ in range(100):
+        try:
+            await client.get("/health")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def run(server, subscribers, updates):
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=60, limits=limits) as client:
+        await wait_for_server(client)
+        tokens = []
+        for i in range(updates + 1):
+            r = await client.post("/api/auth/register", json={
+                "surname": f"U{i}", "name": "Stream", "password": "password123"})
+            tokens.append(r.json()["access_token"])
+        headers = {"Authorization": f"Bearer {tokens[0]}"}
+        await client.post("/api/events", headers=headers, json={
+            "title": "Stream", "event_type": "meetup", "location": "Hall",
+            "event_date": "2030-01-01T10:00:00", "total_seats": updates + 10})
+
+        base_rss = rss_mb(server.pid)
+        connected = 0
+        received = []
+        expected = None
+        all_connected = asyncio.Event()
+
+        async def listen():
+            nonlocal connected
+            async with client.stream("GET", "/api/events/stream",
+                                     params={"ids": "1"}) as response:
+                connected += 1
+                if connected == subscribers:
+                    all_connected.set()
+                async for line in response.aiter_lines():
+                    if expected and line.startswith("data:") and expected in line:
+                        received.append(time.perf_counter())
+
+        tasks = [asyncio.create_task(listen()) for _ in range(subscribers)]
+        await all_connected.wait()
+        await asyncio.sleep(1)
+        per_stream_kb = (rss_mb(server.pid) - base_rss) * 1024 / subscribers
+
+        latencies = []
+        for i in range(1, updates + 1):
+            received.clear()
+            expected = f"[{updates + 10 - i},"
+            start = time.perf_counter()
+            await client.post("/api/registrations", json={"event_id": 1},
+                              headers={"Authorization": f"Bearer {tokens[i]}"})
+            while len(received) < subscribers:
+                await asyncio.sleep(0.005)
+            latencies.append((max(received) - start) * 1000)
+
+        for t in tasks:
+            t.cancel()
+        return per_stream_kb, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp}/stream.db",
+               SESSION_SECRET="benchmark", PYTHONPATH=os.getcwd())
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT),
+         "--log-level", "warning"],
+        cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        per_stream_kb, latencies = asyncio.run(run(server, args.subscribers, args.updates))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{args.subscribers} subscribers on one worker")
+    print(f"  server memory per stream  {per_stream_kb:6.1f} KiB")
+    print("  registration -> last subscriber notified: "
+          + ", ".join(f"{ms:.0f} ms" for ms in latencies))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Serialization cost of /api/events bodies at 1k, 10k and 100k rows.
+
+Fetches the same events with their organizers four ways and reports the
+time to a finished JSON body, with the query included:
+
+  response_model  ORM objects validated through List[EventResponse] and
+                  encoded with the stdlib json module, as FastAPI does for
+                  an endpoint that returns them
+  dump_json       ORM objects through a pydantic TypeAdapter (the listing
+                  path before serialization.py)
+  rows            EVENT_ROWS: plain rows encoded by orjson
+  streamed        stream_json_array over the same rows, chunks joined
+
+Uses a scratch SQLite file. Run from the backend directory:
+
+    python -m benchmarks.serialization --rows 1000 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+_cwd = os.getcwd()
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/serialization.db"
+sys.path.insert(0, _cwd)
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from database import Base, engine, AsyncSessionLocal  # noqa: E402
+from models import User, Event  # noqa: E402
+from schemas import EventResponse  # noqa: E402
+from serialization import EVENT_ROWS, stream_json_array  # noqa: E402
+
+adapter = TypeAdapter(List[EventResponse])
+
+
+def seed(rows):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            dict(surname=f"User{i}", name="Bench", email=f"u{i}@bench.local",
+                 password="x", token_version=0)
+            for i in range(1, 1001)
+        ])
+        conn.execute(insert(Event), [
+            dict(title=f"Event {i}", description="An event description " * 5,
+                 event_type="meetup", event_date=now + timedelta(minutes=i),
+                 location="Main Hall", total_seats=100, available_seats=50,
+                 organizer_id=i % 1000 + 1)
+            for i in range(rows)
+        ])
+
+
+def orm_statement(rows):
+    return (select(Event).options(joinedload(Event.organizer))
+            .order_by(Event.event_date, Event.id).limit(rows))
+
+
+def rows_statement(rows):
+    return EVENT_ROWS.select().order_by(Event.event_date, Event.id).limit(rows)
+
+
+async def response_model(rows):
+    async with AsyncSessionLocal() as db:
+        events = (await db.execute(orm_statement(rows))).scalars().all()
+        validated = adapter.validate_python(events, from_attributes=True)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def dump_json(rows):
+    async with AsyncSessionLocal() as db:
+        events = (await db.execute(orm_statement(rows))).scalars().all()
+        return adapter.dump_json(events)
+
+
+async def fast_rows(rows):
+    async with AsyncSessionLocal() as db:
+        return EVENT_ROWS.dumps((await db.execute(rows_statement(rows))).all())
+
+
+async def streamed(rows):
+    return b"".join([chunk async for chunk in
+                     stream_json_array(EVENT_ROWS, rows_statement(rows))])
+
+
+PATHS = {
+    "response_model": response_model,
+    "dump_json": dump_json,
+    "rows": fast_rows,
+    "streamed": streamed,
+}
+
+
+async def run(sizes, repeat):
+    print(f"median ms of {repeat} runs (query included)")
+    print(f"  {'rows':>7}" + "".join(f"{name:>16}" for name in PATHS))
+    for rows in sizes:
+        bodies = {}
+        medians = []
+        for name, path in PATHS.items():
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                bodies[name] = await path(rows)
+                samples.append((time.perf_counter() - start) * 1000)
+            medians.append(statistics.median(samples))
+        assert len({len(json.loads(body)) for body in bodies.values()}) == 1
+        print(f"  {rows:>7}" + "".join(f"{ms:16.1f}" for ms in medians))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger("innoevent").setLevel(logging.WARNING)
+    seed(max(args.rows))
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
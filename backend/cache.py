@@ -0,0 +1,176 @@
+"""Read-through cache of serialized event payloads.
+
+Event detail responses are cached under "event:<id>" and listing pages
+under a key built from their query parameters plus the current cache
+generation. Every event change deletes the detail entry and bumps the
+generation, which orphans all cached listing pages at once; orphaned
+entries age out through LRU/TTL. A fill is dropped if the generation
+moved while the value was being built, so a slow reader cannot put back
+data that a concurrent write has just invalidated.
+
+The default backend is per-process memory. Set CACHE_BACKEND=redis (and
+REDIS_URL) to share entries and invalidations between workers. A memory
+cache does not see the invalidations of the other workers, so with
+WEB_CONCURRENCY > 1 its entries (which carry available_seats) live for
+one second by default instead of thirty.
+"""
+from collections import OrderedDict
+import os
+import threading
+import time
+
+from metrics import metrics
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+WORKERS = int(os.getenv("WEB_CONCURRENCY") or 1)
+EVENT_CACHE_TTL = float(os.getenv(
+    "EVENT_CACHE_TTL", 1 if CACHE_BACKEND == "memory" and WORKERS > 1 else 30))
+EVENT_CACHE_SIZE = int(os.getenv("EVENT_CACHE_SIZE", 1024))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class MemoryCache:
+    """Thread-safe TTL + LRU cache of bytes values"""
+
+    def __init__(self, maxsize=EVENT_CACHE_SIZE, ttl=EVENT_CACHE_TTL, name="events"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    metrics.record_cache(self.name, "hit")
+                    return value
+                del self._data[key]
+        metrics.record_cache(self.name, "miss")
+        return None
+
+    def set(self, key, value, generation=None):
+        """Store value unless the generation moved since it was read"""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                metrics.record_cache(self.name, "eviction")
+        return True
+
+    def invalidate(self, *keys):
+        """Delete keys and bump the generation"""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """Shared cache in Redis with the same interface as MemoryCache.
+
+    Eviction is left to the server's maxmemory-policy (use allkeys-lru).
+    """
+
+    def __init__(self, url=REDIS_URL, ttl=EVENT_CACHE_TTL, name="events"):
+        import redis  # optional dependency, only needed for this backend
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.name = name
+        self._prefix = f"innoevent:{name}:"
+        self._generation_key = self._prefix + "generation"
+
+    def generation(self):
+        return int(self._redis.get(self._generation_key) or 0)
+
+    def get(self, key):
+        value = self._redis.get(self._prefix + key)
+        metrics.record_cache(self.name, "hit" if value is not None else "miss")
+        return value
+
+    def set(self, key, value, generation=None):
+        if generation is not None and generation != self.generation():
+            return False
+        self._redis.set(self._prefix + key, value, px=int(self.ttl * 1000))
+        return True
+
+    def invalidate(self, *keys):
+        pipe = self._redis.pipeline()
+        for key in keys:
+            pipe.delete(self._prefix + key)
+        pipe.incr(self._generation_key)
+        pipe.execute()
+
+    def clear(self):
+        pipe = self._redis.pipeline()
+        for key in self._redis.scan_iter(self._prefix + "*"):
+            if key.decode() != self._generation_key:
+                pipe.delete(key)
+        pipe.incr(self._generation_key)
+        pipe.execute()
+
+    def __len__(self):
+        return 0
+
+
+def _create_cache():
+    if CACHE_BACKEND == "redis":
+        return RedisCache()
+    return MemoryCache()
+
+
+event_cache = _create_cache()
+
+
+def event_key(event_id):
+    return f"event:{event_id}"
+
+
+def events_page_key(generation, **params):
+    """Key for a listing page; includes the generation so changes orphan it"""
+    parts = [f"{name}={params[name]}" for name in sorted(params)
+             if params[name] is not None]
+    return f"events:{generation}:" + "&".join(parts)
+
+
+def pack_page(body, next_cursor):
+    """Frame a listing page as 'cursor\\nbody' (cursors are base64, no newline)"""
+    return (next_cursor or "").encode() + b"\n" + body
+
+
+def unpack_page(value):
+    cursor, body = value.split(b"\n", 1)
+    return body, cursor.decode() or None
+
+
+def invalidate_event(event_id):
+    """Drop a changed event and every listing page"""
+    event_cache.invalidate(event_key(event_id))
+
+
+def invalidate_event_pages():
+    """Drop every cached listing page (e.g. events were imported)"""
+    event_cache.invalidate()
+
+
+def invalidate_all_events():
+    """Drop every cached event payload (e.g. an organizer changed)"""
+    event_cache.clear()
@@ -0,0 +1,188 @@
+"""gzip / brotli compression of responses.
+
+CompressionMiddleware compresses a response when all of these hold:
+
+  - the client accepts br or gzip (br only if the brotli package is
+    installed, preferred at equal q),
+  - its media type is in COMPRESSION_TYPES and it is not encoded yet,
+  - a body sent in one piece is at least COMPRESSION_MIN_SIZE bytes.
+
+A streamed body (several body messages) is compressed chunk by chunk
+and flushed after every chunk, so the client can decode each chunk as
+soon as it arrives. Its size is not known up front, so the size
+threshold does not apply. Server-sent events are left out of the
+default allowlist: their messages are tiny, and proxies tend to buffer
+compressed streams.
+
+Compressed responses carry Vary: Accept-Encoding and a weak ETag, since
+their bytes differ from the uncompressed ones. If-None-Match is compared
+weakly (etag.py), so revalidation works either way.
+"""
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli  # optional dependency, enables br
+except ImportError:
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+COMPRESSION_TYPES = frozenset(
+    t.strip() for t in os.getenv(
+        "COMPRESSION_TYPES",
+        "application/json,text/html,text/css,text/plain,text/javascript,"
+        "application/javascript,image/svg+xml"
+    ).split(",") if t.strip()
+)
+
+
+class _GzipEncoder:
+    def __init__(self, level=GZIP_LEVEL):
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        """Compressed data, flushed so the client can decode it now"""
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data=b""):
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, quality=BROTLI_QUALITY):
+        self._brotli = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        """Compressed data, flushed so the client can decode it now"""
+        return self._brotli.process(data) + self._brotli.flush()
+
+    def finish(self, data=b""):
+        return self._brotli.process(data) + self._brotli.finish()
+
+
+# Supported encodings, preferred first
+ENCODERS = {"gzip": _GzipEncoder}
+if brotli is not None:
+    ENCODERS = {"br": _BrotliEncoder, **ENCODERS}
+
+
+def choose_encoding(accept_encoding: str, supported=None):
+    """Best encoding in an Accept-Encoding header, or None.
+
+    supported lists the candidates, preferred first (default: ENCODERS).
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODERS if supported is None else supported:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses (see module docstring)"""
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE, levels=None,
+                 content_types=COMPRESSION_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        # Encoding -> level; None uses GZIP_LEVEL / BROTLI_QUALITY
+        self.levels = levels or {}
+        self.content_types = content_types
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _Responder(self, encoding, send).send)
+
+    def compressible(self, status, headers):
+        # 206: compressing a byte range would not give the client that range
+        if status < 200 or status in (204, 206, 304) or "content-encoding" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", ""):
+            return False
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return media_type in self.content_types
+
+
+class _Responder:
+    """send() wrapper for one response"""
+
+    def __init__(self, middleware, encoding, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def send(self, message):
+        if self.passthrough:
+            await self._send(message)
+        elif message["type"] == "http.response.start":
+            self.start = message
+        elif self.encoder is not None:
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            data = self.encoder.compress(body) if more_body else self.encoder.finish(body)
+            await self._send({"type": "http.response.body", "body": data,
+                              "more_body": more_body})
+        elif message["type"] == "http.response.body":
+            await self._first_body(message)
+        else:
+            self.passthrough = True
+            await self._send(self.start)
+            await self._send(message)
+
+    async def _first_body(self, message):
+        headers = MutableHeaders(raw=self.start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        compressible = self.middleware.compressible(self.start["status"], headers)
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+        if not compressible or (not more_body and len(body) < self.middleware.minimum_size):
+            self.passthrough = True
+            await self._send(self.start)
+            await self._send(message)
+            return
+
+        level = self.middleware.levels.get(self.encoding)
+        encoder_class = ENCODERS[self.encoding]
+        self.encoder = encoder_class() if level is None else encoder_class(level)
+        headers["Content-Encoding"] = self.encoding
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        if more_body:
+            data = self.encoder.compress(body)
+            if "content-length" in headers:
+                del headers["content-length"]
+        else:
+            data = self.encoder.finish(body)
+            headers["Content-Length"] = str(len(data))
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": data,
+                          "more_body": more_body})
@@ -1,9 +1,19 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select, delete
+from sqlalchemy.orm import Session, joinedload, contains_eager
+from sqlalchemy import select, delete, update, func, and_, or_
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
-from models import User, Event, Registration
+from enum import Enum
+import base64
+from models import User, Event, Registration, WaitlistEntry
 from schemas import UserCreate, UserUpdate, EventCreate, EventUpdate, RegistrationCreate
 from logging_config import logger
+from search import search_terms, search_statement
+from passwords import hash_password
+from cache import invalidate_event, invalidate_all_events
+from aggregates import (
+    user_registrations, user_events, event_registered_users,
+    type_counts, type_registrations, type_event_removed
+)
 
 # ===== USER OPERATIONS =====
 
@@ -15,12 +25,12 @@ def create_user(db: Session, user: UserCreate):
         name=user.name,
         phone=user.phone,
         email=user.email,
-        password=user.password
+        password=hash_password(user.password)
     )
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    logger.info(f"User created: {user.surname} {user.name}")
+    logger.info("User created: %s %s", user.surname, user.name)
     return db_user
 
 
@@ -46,12 +56,15 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate):
         return None
 
     update_data = user_update.model_dump(exclude_unset=True)
+    if update_data.get('password'):
+        update_data['password'] = hash_password(update_data['password'])
     for key, value in update_data.items():
         setattr(db_user, key, value)
 
     db.commit()
     db.refresh(db_user)
-    logger.info(f"User profile updated: ID {user_id}")
+    logger.info("User profile updated: ID %s", user_id)
+    invalidate_all_events()
     return db_user
 
 
@@ -60,9 +73,11 @@ def delete_user(db: Session, user_id: int):
     db_user = get_user_by_id(db, user_id)
     if not db_user:
         return 0
+    db.execute(delete(WaitlistEntry).where(WaitlistEntry.user_id == user_id))
     db.delete(db_user)
     db.commit()
-    logger.warning(f"User deleted: ID {user_id}")
+    logger.warning("User deleted: ID %s", user_id)
+    invalidate_all_events()
     return 1
 
 # ===== EVENT OPERATIONS =====
@@ -81,15 +96,19 @@ def create_event(db: Session, event: EventCreate, organizer_id: int):
         organizer_id=organizer_id
     )
     db.add(db_event)
+    db.execute(user_events(organizer_id, 1))
+    db.execute(type_counts(db.get_bind().dialect.name, event.event_type, events=1))
     db.commit()
     db.refresh(db_event)
-    logger.info(f"Event created: {event.title} ({event.event_type})")
+    logger.info("Event created: %s (%s)", event.title, event.event_type)
+    invalidate_event(db_event.id)
     return db_event
 
 
 def get_event_by_id(db: Session, event_id: int):
     """Get event by ID"""
-    return db.query(Event).filter(Event.id == event_id).first()
+    return db.query(Event).options(joinedload(Event.organizer)).filter(
+        Event.id == event_id).first()
 
 
 def get_all_events(db: Session):
@@ -97,6 +116,102 @@ def get_all_events(db: Session):
     return db.query(Event).order_by(Event.event_date).all()
 
 
+def encode_event_cursor(event: Event):
+    """Encode (event_date, id) of the last row into an opaque cursor"""
+    raw = f"{event.event_date.isoformat()}|{event.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_event_cursor(cursor: str):
+    """Decode cursor into (event_date, id); raises ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        event_date, event_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(event_date), int(event_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def events_page_statement(limit: int, cursor: str = None,
+                          date_from: datetime = None, date_to: datetime = None,
+                          event_type: str = None, location: str = None,
+                          has_seats: bool = None, base=None):
+    """Build the SELECT for one page of events (shared with async_crud).
+
+    Fetches limit + 1 rows so the caller can tell whether a next page
+    exists. base replaces the default SELECT of events with their
+    organizers. Raises ValueError if the cursor is malformed.
+    """
+    stmt = base if base is not None else select(Event).options(joinedload(Event.organizer))
+
+    if event_type:
+        stmt = stmt.where(Event.event_type == event_type)
+    if location:
+        stmt = stmt.where(Event.location == location)
+    if date_from:
+        stmt = stmt.where(Event.event_date >= date_from)
+    if date_to:
+        stmt = stmt.where(Event.event_date < date_to)
+    if has_seats is True:
+        stmt = stmt.where(Event.available_seats > 0)
+    elif has_seats is False:
+        stmt = stmt.where(Event.available_seats <= 0)
+
+    if cursor:
+        last_date, last_id = decode_event_cursor(cursor)
+        stmt = stmt.where(or_(
+            Event.event_date > last_date,
+            and_(Event.event_date == last_date, Event.id > last_id)
+        ))
+
+    return stmt.order_by(Event.event_date, Event.id).limit(limit + 1)
+
+
+def split_events_page(events, limit: int):
+    """Trim the extra row fetched by events_page_statement.
+
+    Returns (events, next_cursor), where next_cursor is None on the last page.
+    """
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_event_cursor(events[-1])
+    return events, next_cursor
+
+
+def get_events_page(db: Session, limit: int, cursor: str = None,
+                    date_from: datetime = None, date_to: datetime = None,
+                    event_type: str = None, location: str = None,
+                    has_seats: bool = None):
+    """Get one page of events ordered by (event_date, id).
+
+    Uses keyset pagination so the cost of a page does not depend on how
+    deep into the listing it is. Returns (events, next_cursor), where
+    next_cursor is None on the last page.
+    """
+    stmt = events_page_statement(
+        limit, cursor=cursor, date_from=date_from, date_to=date_to,
+        event_type=event_type, location=location, has_seats=has_seats
+    )
+    events = db.execute(stmt).scalars().all()
+    return split_events_page(events, limit)
+
+
+def search_events(db: Session, query: str, limit: int, offset: int = 0):
+    """Full-text search, best match first (see search.py).
+
+    Returns (events, next_offset), where next_offset is None on the last page.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], None
+    stmt = search_statement(db.get_bind().dialect.name, terms, limit + 1, offset)
+    events = db.execute(stmt).scalars().all()
+    if len(events) > limit:
+        return events[:limit], offset + limit
+    return events, None
+
+
 def get_events_by_type(db: Session, event_type: str):
     """Get events by type"""
     return db.query(Event).filter(Event.event_type == event_type).order_by(Event.event_date).all()
@@ -104,28 +219,68 @@ def get_events_by_type(db: Session, event_type: str):
 
 def get_user_events(db: Session, user_id: int):
     """Get events organized by user"""
-    return db.query(Event).filter(Event.organizer_id == user_id).order_by(Event.event_date).all()
+    return db.query(Event).options(joinedload(Event.organizer)).filter(
+        Event.organizer_id == user_id).order_by(Event.event_date).all()
+
+
+def resize_event_statement(event_id: int, total_seats: int):
+    """UPDATE setting total_seats and shifting available_seats by the change.
+
+    The seats taken are read from the row by the statement itself, so a
+    reservation committed since the event was loaded is kept. Matches no
+    row if total_seats is below the seats already taken.
+    """
+    taken = Event.total_seats - Event.available_seats
+    return (
+        update(Event)
+        .where(Event.id == event_id, taken <= total_seats)
+        .values(total_seats=total_seats, available_seats=total_seats - taken)
+        .execution_options(synchronize_session=False)
+    )
 
 
 def update_event(db: Session, event_id: int, event_update: EventUpdate):
-    """Update event"""
+    """Update event.
+
+    Raises ValueError if total_seats is below the number of registrations.
+    """
     db_event = get_event_by_id(db, event_id)
     if not db_event:
         return None
 
     update_data = event_update.model_dump(exclude_unset=True)
-    
-    if 'total_seats' in update_data:
-        new_total_seats = update_data['total_seats']
-        registered_count = len(db_event.registrations)
-        update_data['available_seats'] = new_total_seats - registered_count
-    
+    total_seats = update_data.pop('total_seats', None)
+    old_type = db_event.event_type
+
+    if total_seats is not None and \
+            not db.execute(resize_event_statement(event_id, total_seats)).rowcount:
+        db.rollback()
+        raise ValueError("total_seats is below the number of registrations")
     for key, value in update_data.items():
         setattr(db_event, key, value)
+    # Every write above holds the event row until commit
+    db.flush()
+    db.refresh(db_event)
+    registered = db_event.total_seats - db_event.available_seats
+
+    if db_event.event_type != old_type:
+        dialect = db.get_bind().dialect.name
+        db.execute(type_counts(dialect, old_type, events=-1, registrations=-registered))
+        db.execute(type_counts(dialect, db_event.event_type, events=1,
+                               registrations=registered))
+
+    if db_event.available_seats > 0 and total_seats is not None:
+        promoted = _promote_waitlist(db, event_id, db_event.available_seats)
+        if promoted:
+            db.execute(
+                update(Event).where(Event.id == event_id)
+                .values(available_seats=Event.available_seats - len(promoted))
+                .execution_options(synchronize_session=False))
 
     db.commit()
     db.refresh(db_event)
-    logger.info(f"Event updated: ID {event_id}")
+    logger.info("Event updated: ID %s", event_id)
+    invalidate_event(event_id)
     return db_event
 
 
@@ -134,51 +289,87 @@ def delete_event(db: Session, event_id: int):
     db_event = get_event_by_id(db, event_id)
     if not db_event:
         return 0
+    # Lock the event against seat reservations (Postgres); on SQLite the
+    # first write below takes the lock. The registrations are counted
+    # inside the UPDATEs, after the lock, not read beforehand.
+    _lock_event(db, event_id)
+    db.execute(type_event_removed(event_id))
+    db.execute(user_registrations(event_registered_users(event_id), -1))
+    if db_event.organizer_id:
+        db.execute(user_events(db_event.organizer_id, -1))
+    db.execute(delete(WaitlistEntry).where(WaitlistEntry.event_id == event_id))
     db.delete(db_event)
     db.commit()
-    logger.warning(f"Event deleted: ID {event_id}")
+    logger.warning("Event deleted: ID %s", event_id)
+    invalidate_event(event_id)
     return 1
 
 # ===== REGISTRATION OPERATIONS =====
 
 
-def register_user_for_event(db: Session, user_id: int, event_id: int):
-    """Register user for event"""
-
-    # Check if user already registered
-    existing = db.query(Registration).filter(
-        (Registration.user_id == user_id) &
-        (Registration.event_id == event_id)
-    ).first()
-    if existing:
-        return None
-
-    # Check if event exists and has available seats
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event or event.available_seats <= 0:
-        return None
+class ReservationStatus(str, Enum):
+    """Outcome of a seat reservation attempt"""
+    OK = "ok"
+    SOLD_OUT = "sold_out"
+    DUPLICATE = "duplicate"
+    EVENT_NOT_FOUND = "event_not_found"
+    USER_NOT_FOUND = "user_not_found"
+    WAITLISTED = "waitlisted"
+
+
+def reserve_seat(db: Session, user_id: int, event_id: int):
+    """Atomically claim a seat and register user for event.
+
+    The seat is claimed with a single conditional UPDATE, so concurrent
+    requests can never push available_seats below zero. Double registration
+    is rejected by the unique (user_id, event_id) constraint; the rollback
+    also returns the claimed seat. Returns (ReservationStatus, registration).
+    """
+    claimed = db.execute(
+        update(Event)
+        .where(Event.id == event_id, Event.available_seats > 0)
+        .values(available_seats=Event.available_seats - 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if not claimed:
+        db.rollback()
+        exists = db.query(Event.id).filter(Event.id == event_id).first()
+        if not exists:
+            return ReservationStatus.EVENT_NOT_FOUND, None
+        return ReservationStatus.SOLD_OUT, None
 
-    # Create registration
     registration = Registration(
         user_id=user_id,
         event_id=event_id,
         registered_at=datetime.utcnow()
     )
     db.add(registration)
+    db.execute(user_registrations(user_id, 1))
+    db.execute(type_registrations(event_id, 1))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return ReservationStatus.DUPLICATE, None
 
-    # Update available seats
-    event.available_seats -= 1
-    db.add(event)
-
-    db.commit()
     db.refresh(registration)
-    logger.info(f"User {user_id} registered for event {event_id}")
+    logger.info("User %s registered for event %s", user_id, event_id)
+    invalidate_event(event_id)
+    return ReservationStatus.OK, registration
+
+
+def register_user_for_event(db: Session, user_id: int, event_id: int):
+    """Register user for event"""
+    _, registration = reserve_seat(db, user_id, event_id)
     return registration
 
 
 def get_user_registrations(db: Session, user_id: int):
-    """Get user registrations"""
-    return db.query(Registration).filter(Registration.user_id == user_id).all()
+    """Get user registrations with their events and organizers in one query"""
+    return db.query(Registration).join(Registration.event).options(
+        contains_eager(Registration.event).joinedload(Event.organizer)
+    ).filter(Registration.user_id == user_id).order_by(Registration.id).all()
 
 
 def get_event_registrations(db: Session, event_id: int):
@@ -187,7 +378,11 @@ def get_event_registrations(db: Session, event_id: int):
 
 
 def cancel_registration(db: Session, registration_id: int):
-    """Cancel registration and free up seat"""
+    """Cancel registration and hand the seat to the head of the waitlist.
+
+    The seat only goes back on sale when nobody is waiting. Promotion
+    happens in the same transaction as the delete.
+    """
 
     registration = db.query(Registration).filter(
         Registration.id == registration_id
@@ -196,15 +391,149 @@ def cancel_registration(db: Session, registration_id: int):
     if not registration:
         return 0
 
-    # Get event and restore seat
-    event = db.query(Event).filter(Event.id == registration.event_id).first()
-    if event:
-        event.available_seats += 1
-        db.add(event)
+    event_id = registration.event_id
+    _lock_event(db, event_id)
+
+    # Delete registration; a concurrent cancel of the same row finds nothing
+    deleted = db.execute(
+        delete(Registration).where(Registration.id == registration_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not deleted:
+        db.rollback()
+        return 0
+    db.expunge(registration)
+    if registration.user_id:
+        db.execute(user_registrations(registration.user_id, -1))
+    db.execute(type_registrations(event_id, -1))
+
+    if not _promote_waitlist(db, event_id, 1):
+        # Restore seat in place so concurrent reservations are not overwritten
+        db.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .values(available_seats=Event.available_seats + 1)
+            .execution_options(synchronize_session=False)
+        )
 
-    # Delete registration
-    db.delete(registration)
     db.commit()
-    logger.info(f"Registration canceled: ID {registration_id}")
+    logger.info("Registration canceled: ID %s", registration_id)
+    invalidate_event(event_id)
 
     return 1
+
+# ===== WAITLIST OPERATIONS =====
+#
+# Cancels, joins and seat increases serialize on the event row
+# (SELECT ... FOR UPDATE on Postgres; SQLite has a single writer).
+# Every waitlist read that decides a promotion happens after the
+# transaction's first write, so it sees the latest committed queue.
+
+
+def _lock_event(db: Session, event_id: int):
+    """Lock the event row; returns its available_seats (None if missing)"""
+    return db.scalar(
+        select(Event.available_seats).where(Event.id == event_id).with_for_update())
+
+
+def _promote_waitlist(db: Session, event_id: int, seats: int):
+    """Move up to seats users from the head of the waitlist to registrations.
+
+    Each promotion is one index seek on (event_id, position). The caller
+    holds the event lock and commits. Returns the new registrations.
+    """
+    promoted = []
+    while len(promoted) < seats:
+        head = db.scalar(
+            select(WaitlistEntry).where(WaitlistEntry.event_id == event_id)
+            .order_by(WaitlistEntry.position).limit(1)
+        )
+        if head is None:
+            break
+        db.delete(head)
+        db.flush()
+        registered = db.scalar(select(Registration.id).where(
+            Registration.user_id == head.user_id, Registration.event_id == event_id))
+        if registered:
+            continue
+        registration = Registration(
+            user_id=head.user_id,
+            event_id=event_id,
+            registered_at=datetime.utcnow()
+        )
+        db.add(registration)
+        db.flush()
+        promoted.append(registration)
+        logger.info("User %s promoted from waitlist for event %s",
+                    head.user_id, event_id)
+    if promoted:
+        db.execute(user_registrations([r.user_id for r in promoted], 1))
+        db.execute(type_registrations(event_id, len(promoted)))
+    return promoted
+
+
+def join_waitlist(db: Session, user_id: int, event_id: int):
+    """Queue user for a sold-out event.
+
+    If a seat was freed in the meantime the user is registered instead.
+    Returns (ReservationStatus, WaitlistEntry or Registration).
+    """
+    while True:
+        if _lock_event(db, event_id) is None:
+            db.rollback()
+            return ReservationStatus.EVENT_NOT_FOUND, None
+        if db.scalar(select(Registration.id).where(
+                Registration.user_id == user_id, Registration.event_id == event_id)):
+            db.rollback()
+            return ReservationStatus.DUPLICATE, None
+        entry = db.scalar(select(WaitlistEntry).where(
+            WaitlistEntry.user_id == user_id, WaitlistEntry.event_id == event_id))
+        if entry:
+            db.rollback()
+            return ReservationStatus.WAITLISTED, entry
+
+        last = db.scalar(select(func.max(WaitlistEntry.position))
+                         .where(WaitlistEntry.event_id == event_id))
+        entry = WaitlistEntry(event_id=event_id, user_id=user_id,
+                              position=(last or 0) + 1, joined_at=datetime.utcnow())
+        db.add(entry)
+        try:
+            db.flush()
+            break
+        except IntegrityError:
+            # Another join took this position (or queued this user); retry
+            db.rollback()
+
+    # A cancel may have freed a seat before this transaction started
+    available = db.scalar(select(Event.available_seats).where(Event.id == event_id))
+    promoted = _promote_waitlist(db, event_id, available) if available > 0 else []
+    if promoted:
+        db.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .values(available_seats=Event.available_seats - len(promoted))
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+    if promoted:
+        invalidate_event(event_id)
+    for registration in promoted:
+        if registration.user_id == user_id:
+            return ReservationStatus.OK, registration
+    logger.info("User %s joined waitlist for event %s", user_id, event_id)
+    return ReservationStatus.WAITLISTED, entry
+
+
+def get_waitlist_position(db: Session, entry: WaitlistEntry):
+    """1-based place of entry in its event's queue"""
+    return db.scalar(select(func.count(WaitlistEntry.id)).where(
+        WaitlistEntry.event_id == entry.event_id,
+        WaitlistEntry.position <= entry.position))
+
+
+def leave_waitlist(db: Session, entry_id: int):
+    """Remove a waitlist entry"""
+    result = db.execute(delete(WaitlistEntry).where(WaitlistEntry.id == entry_id))
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,47 @@
+"""Strong ETags and If-None-Match handling for the read endpoints.
+
+Tags are derived either from the response bytes (cached payloads) or from
+the version columns of the rows a response is built from, so the second
+kind can be checked with a narrow query before loading and serializing
+anything.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+
+def etag_for_bytes(body):
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_for_versions(kind, rows):
+    """Tag for a response described by (id, updated_at, ...) tuples"""
+    digest = hashlib.sha1(kind.encode())
+    for row in rows:
+        digest.update(repr(tuple(row)).encode())
+    return '"' + digest.hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag):
+    """True if the request's If-None-Match covers etag (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag):
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def cache_headers(etag):
+    # no-cache: the browser keeps the copy but revalidates every time
+    return {"ETag": etag, "Cache-Control": "no-cache"}
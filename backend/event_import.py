@@ -0,0 +1,118 @@
+"""Streaming parsers for bulk event import.
+
+Uploads are read chunk by chunk from the request body and turned into
+(line number, EventCreate or error message) pairs one record at a time,
+so an import of any size only keeps the current batch in memory.
+
+Two formats are accepted:
+  text/csv               header row with EventCreate field names
+  application/x-ndjson   one JSON object per line
+
+Both must be UTF-8 (a byte order mark is allowed). The first line that
+is not raises ImportEncodingError, and nothing is imported.
+"""
+import csv
+import json
+
+from pydantic import ValidationError
+
+from schemas import EventCreate
+
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+BOM = b"\xef\xbb\xbf"
+
+
+class ImportEncodingError(ValueError):
+    """An uploaded line is not valid UTF-8"""
+
+    def __init__(self, line_no):
+        super().__init__(f"Line {line_no} is not valid UTF-8")
+        self.line_no = line_no
+
+
+def _decode(line, line_no):
+    if line_no == 1 and line.startswith(BOM):
+        line = line[len(BOM):]
+    try:
+        return line.rstrip(b"\r").decode("utf-8")
+    except UnicodeDecodeError:
+        raise ImportEncodingError(line_no) from None
+
+
+async def iter_lines(chunks):
+    """Yield decoded lines (without line endings) from an async byte stream.
+
+    Lines are split before decoding: a newline byte never occurs inside a
+    multi-byte UTF-8 character, and a bad byte can be traced to its line.
+    """
+    tail = b""
+    line_no = 0
+    async for chunk in chunks:
+        tail += chunk
+        *lines, tail = tail.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield _decode(line, line_no)
+    if tail:
+        yield _decode(tail, line_no + 1)
+
+
+async def _csv_records(lines):
+    header = None
+    record, start, line_no = "", 0, 0
+    async for line in lines:
+        line_no += 1
+        if not record:
+            start = line_no
+        record = record + "\n" + line if record else line
+        # A quoted field may span lines; quotes are escaped by doubling,
+        # so the record is complete once the quote count is even
+        if record.count('"') % 2:
+            continue
+        row = next(csv.reader([record]), [])
+        record = ""
+        if not row:
+            continue
+        if header is None:
+            header = [name.strip() for name in row]
+            continue
+        yield start, dict(zip(header, row))
+    if record:
+        yield start, "Unterminated quoted field"
+
+
+async def _json_records(lines):
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, f"Invalid JSON: {e}"
+
+
+async def iter_events(chunks, content_type):
+    """Yield (line, EventCreate) or (line, error message) for an upload"""
+    lines = iter_lines(chunks)
+    if content_type.split(";")[0].strip().lower() in CSV_CONTENT_TYPES:
+        records = _csv_records(lines)
+    else:
+        records = _json_records(lines)
+
+    async for line_no, data in records:
+        if isinstance(data, str):
+            yield line_no, data
+            continue
+        if not isinstance(data, dict):
+            yield line_no, "Expected an object"
+            continue
+        # Empty CSV cells mean "not set"
+        data = {k: v for k, v in data.items() if v != ""}
+        try:
+            yield line_no, EventCreate.model_validate(data)
+        except ValidationError as e:
+            yield line_no, "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                for err in e.errors())
@@ -1,18 +1,46 @@
 import logging
+import logging.handlers
 import json
 from datetime import datetime
+from contextvars import ContextVar
+import atexit
 import os
+import queue
 
 # Создаём директорию для логов
 os.makedirs('logs', exist_ok=True)
 
+# Ротация: по размеру (LOG_MAX_BYTES) или по времени (LOG_ROTATE_WHEN=midnight, H, ...)
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN')
+
+# Каждый процесс ротирует свои файлы сам, поэтому при нескольких воркерах
+# (WEB_CONCURRENCY > 1) у каждого свои файлы: logs/app.<pid>.log и т.д.
+# Иначе воркеры переименовывали бы общий файл независимо друг от друга
+LOG_FILE_PER_PROCESS = os.getenv(
+    'LOG_FILE_PER_PROCESS', str(int(os.getenv('WEB_CONCURRENCY') or 1) > 1)
+).lower() in ('1', 'true', 'yes')
+
+# Пакетная запись: сбрасываем файлы раз в LOG_FLUSH_INTERVAL секунд
+# или после LOG_BATCH_SIZE записей
+LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', 0.5))
+LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', 256))
+
+# Предел очереди записей: если фоновый поток не успевает, новые записи
+# отбрасываются (и считаются), а не копятся в памяти
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+
+# ID текущего запроса, выставляется middleware в main.py
+request_id_var = ContextVar('request_id', default=None)
+
 # Структурированное логирование
 
 
 class JSONFormatter(logging.Formatter):
     def format(self, record):
         log_data = {
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': datetime.utcfromtimestamp(record.created).isoformat(),
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
@@ -20,19 +48,163 @@ class JSONFormatter(logging.Formatter):
             'function': record.funcName,
             'line': record.lineno
         }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            log_data['request_id'] = request_id
+        # Структурированные поля: logger.info(..., extra={'fields': {...}})
+        fields = getattr(record, 'fields', None)
+        if fields:
+            log_data.update(fields)
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
         return json.dumps(log_data)
 
 
+class RequestIdFilter(logging.Filter):
+    """Attach the current request ID to the record on the calling thread"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records without formatting them on the request thread.
+
+    The stock QueueHandler renders the message in prepare() so records can
+    be pickled; our queue is in-process, so message and JSON formatting are
+    left to the listener thread. Log arguments should therefore be plain
+    values (ids, strings), not ORM objects.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # The writer is behind (or stuck on I/O): drop rather than block
+            self.dropped += 1
+
+
+class BatchFlushMixin:
+    """Skip the per-record flush; BatchingQueueListener flushes per batch"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+
+class BatchedRotatingFileHandler(BatchFlushMixin, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class BatchedTimedRotatingFileHandler(BatchFlushMixin, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """Background writer that drains the queue in batches.
+
+    Waits up to flush_interval for the first record, takes up to batch_size
+    more without blocking, writes them and flushes the handlers once.
+    """
+
+    def __init__(self, log_queue, *handlers, flush_interval=LOG_FLUSH_INTERVAL,
+                 batch_size=LOG_BATCH_SIZE):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+    def _flush(self, record):
+        # A failing handler (closed stream, full disk) must not end the
+        # thread: it is the only writer, and the queue would stop draining
+        for handler in self.handlers:
+            try:
+                if hasattr(handler, 'flush_batch'):
+                    handler.flush_batch()
+                else:
+                    handler.flush()
+            except Exception:
+                try:
+                    handler.handleError(record)
+                except Exception:
+                    pass
+
+    def enqueue_sentinel(self):
+        # The queue may be full; wait for the writer to make room
+        try:
+            self.queue.put(self._sentinel, timeout=5)
+        except queue.Full:
+            pass
+
+    def stop(self):
+        """Write out the queued records and end the thread (idempotent)"""
+        if self._thread is None:
+            return
+        self.enqueue_sentinel()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def _monitor(self):
+        q = self.queue
+        while True:
+            batch = []
+            try:
+                batch.append(q.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(q.get_nowait())
+            except queue.Empty:
+                pass
+
+            stop = False
+            records = []
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                    continue
+                self.handle(record)
+                records.append(record)
+            for _ in batch:
+                q.task_done()
+            if records:
+                self._flush(records[-1])
+            if stop:
+                return
+
+
+def _file_handler(filename, level):
+    if LOG_FILE_PER_PROCESS:
+        stem, ext = os.path.splitext(filename)
+        filename = f'{stem}.{os.getpid()}{ext}'
+    if LOG_ROTATE_WHEN:
+        handler = BatchedTimedRotatingFileHandler(
+            filename, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT)
+    else:
+        handler = BatchedRotatingFileHandler(
+            filename, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+    handler.setLevel(level)
+    handler.setFormatter(JSONFormatter())
+    return handler
+
+
 # Основной логгер
 logger = logging.getLogger('innoevent')
 logger.setLevel(logging.DEBUG)
 
 # Файловый обработчик (JSON)
-file_handler = logging.FileHandler('logs/app.log')
-file_handler.setLevel(logging.DEBUG)
-file_handler.setFormatter(JSONFormatter())
+file_handler = _file_handler('logs/app.log', logging.DEBUG)
 
 # Консольный обработчик (текст)
 console_handler = logging.StreamHandler()
@@ -42,13 +214,23 @@ formatter = logging.Formatter(
 )
 console_handler.setFormatter(formatter)
 
-# Добавляем обработчики
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+# Обработчик ошибок (innoevent и innoevent.errors)
+error_handler = _file_handler('logs/errors.log', logging.ERROR)
 
 # Логгер для ошибок
 error_logger = logging.getLogger('innoevent.errors')
-error_handler = logging.FileHandler('logs/errors.log')
-error_handler.setLevel(logging.ERROR)
-error_handler.setFormatter(JSONFormatter())
-error_logger.addHandler(error_handler)
+
+# Медленные SQL-запросы (sql_profiling.py) пишутся ещё и в отдельный файл
+slow_query_handler = _file_handler('logs/slow_queries.log', logging.WARNING)
+slow_query_handler.addFilter(logging.Filter('innoevent.slow_queries'))
+
+# Запись в файлы и консоль выполняется фоновым потоком
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+queue_handler = DeferredQueueHandler(log_queue)
+queue_handler.addFilter(RequestIdFilter())
+logger.addHandler(queue_handler)
+
+listener = BatchingQueueListener(
+    log_queue, file_handler, console_handler, error_handler, slow_query_handler)
+listener.start()
+atexit.register(listener.stop)
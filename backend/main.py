@@ -1,21 +1,49 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from typing import List
 from fastapi import Form
 import time
+import uuid
 
-from database import Base, engine, get_db
-from models import User, Event, Registration
-import crud
+from database import engine, async_engine, AsyncSessionLocal, get_async_db
+import async_crud
+from crud import ReservationStatus
 from schemas import (
-    UserCreate, UserUpdate, UserResponse,
+    UserCreate, UserUpdate, UserResponse, LoginResponse,
     EventCreate, EventUpdate, EventResponse,
-    RegistrationCreate, RegistrationResponse, RegistrationWithEventResponse
+    RegistrationCreate, RegistrationResponse, RegistrationWithEventResponse,
+    WaitlistResponse, BulkRegistrationCreate, BulkRegistrationItem, BulkRegistrationResponse,
+    EventImportItem, EventImportResponse,
+    EventTypeStatsResponse, StatsResponse, UserStatsResponse, DashboardResponse
 )
-from logging_config import logger
-from metrics import metrics
+from event_import import iter_events, ImportEncodingError
+from serialization import (
+    USER_ROWS, EVENT_ROWS, REGISTRATION_ROWS, REGISTRATION_WITH_EVENT_ROWS,
+    stream_json_array, dashboard_json
+)
+from migrations import DB_AUTO_MIGRATE, migrate, check_schema
+from seat_updates import seat_broadcaster, seat_stream, SEAT_STREAM_MAX_IDS
+from sessions import issue_token, get_current_user_id, forget_session
+from passwords import (
+    PasswordPoolBusy, hash_password_async, verify_password_async
+)
+from logging_config import logger, request_id_var
+import sql_profiling
+from compression import COMPRESSION_ENABLED, CompressionMiddleware
+from static_assets import FRONTEND_DIST, FrontendFiles
+from sql_profiling import SQL_PROFILING, SQL_QUERY_WARN
+from cache import (
+    event_cache, event_key, events_page_key, pack_page, unpack_page
+)
+from singleflight import event_flights
+from etag import (
+    etag_for_bytes, etag_for_versions, etag_matches, not_modified, cache_headers
+)
+from metrics import metrics, prometheus_exposition, mark_worker_dead, REQUESTS_IN_PROGRESS
 
 # ===== FASTAPI INITIALIZATION =====
 app = FastAPI(
@@ -24,6 +52,13 @@ app = FastAPI(
     version="1.0.0"
 )
 
+if SQL_PROFILING:
+    sql_profiling.instrument(engine, async_engine.sync_engine)
+
+EVENTS_PAGE_SIZE = 50
+EVENTS_MAX_PAGE_SIZE = 200
+SEARCH_PAGE_SIZE = 20
+
 # CORS for frontend
 app.add_middleware(
     CORSMiddleware,
@@ -31,38 +66,102 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Offset", "X-Request-ID", "ETag"],
 )
 
+# Added after CORS, so it wraps CORS and sees the final headers
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 # ===== MIDDLEWARE =====
 
 
+def _endpoint_label(request: Request):
+    """Route template label, so per-endpoint metrics stay bounded"""
+    route = request.scope.get("route")
+    path = route.path if route else "unmatched"
+    return f"{request.method} {path}"
+
+
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     start_time = time.time()
-    response = await call_next(request)
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    stats = sql_profiling.start_request() if SQL_PROFILING else None
+    REQUESTS_IN_PROGRESS.inc()
+    try:
+        response = await call_next(request)
+    except Exception:
+        process_time = (time.time() - start_time) * 1000
+        metrics.record_request(_endpoint_label(request), 500, process_time)
+        raise
+    finally:
+        REQUESTS_IN_PROGRESS.dec()
     process_time = (time.time() - start_time) * 1000
 
-    metrics.add_response_time(process_time)
-    logger.debug(
-        f"Request {request.method} {request.url.path} took {process_time:.2f}ms")
+    endpoint = _endpoint_label(request)
+    metrics.record_request(endpoint, response.status_code, process_time)
+    if stats is None:
+        logger.debug("Request %s %s took %.2fms",
+                     request.method, request.url.path, process_time)
+    else:
+        fields = {"endpoint": endpoint, "status_code": response.status_code,
+                  "duration_ms": round(process_time, 2),
+                  "db_queries": stats.count, "db_time_ms": round(stats.time_ms, 2)}
+        if stats.count > SQL_QUERY_WARN:
+            logger.warning("Request %s %s ran %d queries",
+                           request.method, request.url.path, stats.count,
+                           extra={"fields": fields})
+        else:
+            logger.debug("Request %s %s took %.2fms (%d queries, %.2fms in db)",
+                         request.method, request.url.path, process_time,
+                         stats.count, stats.time_ms, extra={"fields": fields})
+        response.headers["Server-Timing"] = sql_profiling.server_timing(stats, process_time)
+        # The frontend is on another origin
+        response.headers["Timing-Allow-Origin"] = "*"
 
     response.headers["X-Process-Time"] = str(process_time)
+    response.headers["X-Request-ID"] = request_id
     return response
 
+# ===== ERROR HANDLERS =====
+
+
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+    """Shed load when the password hashing queue is full"""
+    logger.warning("Password hashing queue full, rejecting %s", request.url.path)
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
 # ===== STARTUP =====
 
 
 @app.on_event("startup")
 def startup():
-    """Create tables on startup"""
-    Base.metadata.create_all(bind=engine)
-    logger.info("Application started, database tables created")
+    """Bring the database schema up to date, or check that it is"""
+    if DB_AUTO_MIGRATE:
+        migrate(engine)
+    else:
+        check_schema(engine)
+    logger.info("Application started, database schema is current")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release this worker's live metrics and database connections"""
+    mark_worker_dead()
+    await async_engine.dispose()
 
 # ===== HEALTH CHECK =====
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Check application health"""
     return {
         "status": "ok",
@@ -72,7 +171,7 @@ def health_check():
 
 
 @app.get("/health/detailed")
-def health_check_detailed():
+async def health_check_detailed():
     """Detailed health check"""
     return {
         "status": "healthy",
@@ -86,153 +185,180 @@ def health_check_detailed():
 
 
 @app.get("/metrics")
+def get_prometheus_metrics():
+    """Prometheus metrics aggregated across all workers"""
+    body, content_type = prometheus_exposition()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/metrics/json")
 def get_metrics():
-    """Get detailed application metrics"""
+    """Get detailed application metrics of this worker"""
     return metrics.get_metrics()
 
 # ===== AUTHENTICATION =====
 
 
-@app.post("/api/auth/login", response_model=UserResponse)
-def login(email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    """User login by email and password"""
-    metrics.increment_request()
+def login_response(user):
+    """User fields plus a fresh session token"""
+    return LoginResponse(
+        **UserResponse.model_validate(user).model_dump(),
+        access_token=issue_token(user.id, user.token_version)
+    )
 
-    user = db.query(User).filter(User.email == email).first()
+
+@app.post("/api/auth/login", response_model=LoginResponse)
+async def login(email: str = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_async_db)):
+    """User login by email and password"""
+    user = await async_crud.get_user_by_email(db, email)
 
     if not user:
-        metrics.increment_error()
-        logger.warning(f"Login attempt for non-existent user: {email}")
+        logger.warning("Login attempt for non-existent user: %s", email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found. Please sign up."
         )
 
-    if user.password != password:
-        metrics.increment_error()
-        logger.warning(f"Incorrect password for user: {email}")
+    matches, needs_rehash = await verify_password_async(password, user.password)
+    if not matches:
+        logger.warning("Incorrect password for user: %s", email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password"
         )
 
-    logger.info(f"User {user.surname} {user.name} signed in")
-    return user
+    if needs_rehash:
+        # Plain-text or outdated hash; a busy pool just defers the upgrade
+        try:
+            new_hash = await hash_password_async(password)
+            await async_crud.replace_password_hash(db, user.id, user.password, new_hash)
+        except PasswordPoolBusy:
+            pass
 
+    logger.info("User %s %s signed in", user.surname, user.name)
+    return login_response(user)
+
+
+@app.post("/api/auth/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_async_db)):
+    """Revoke every session of the current user"""
+    await async_crud.revoke_sessions(db, user_id)
+    forget_session(user_id)
 
-@app.post("/api/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    """Register new user"""
-    metrics.increment_request()
 
+@app.post("/api/auth/register", response_model=LoginResponse, status_code=status.HTTP_201_CREATED)
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Register new user"""
     if user.email:
-        existing_user = crud.get_user_by_email(db, user.email)
+        existing_user = await async_crud.get_user_by_email(db, user.email)
         if existing_user:
-            metrics.increment_error()
             logger.warning(
-                f"Registration attempt with existing email: {user.email}")
+                "Registration attempt with existing email: %s", user.email)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
 
-    existing_user = db.query(User).filter(
-        (User.surname == user.surname) & (User.name == user.name)
-    ).first()
+    existing_user = await async_crud.get_user_by_name(db, user.surname, user.name)
     if existing_user:
-        metrics.increment_error()
         logger.warning(
-            f"Registration attempt with existing name: {user.surname} {user.name}")
+            "Registration attempt with existing name: %s %s",
+            user.surname, user.name)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User with this name already exists"
         )
 
-    db_user = crud.create_user(db, user)
-    return db_user
+    db_user = await async_crud.create_user(db, user)
+    return login_response(db_user)
 
 # ===== USER ENDPOINTS =====
 
 
 @app.post("/api/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Create new user (by default use /auth/register)"""
-    metrics.increment_request()
-
     if user.email:
-        existing_user = crud.get_user_by_email(db, user.email)
+        existing_user = await async_crud.get_user_by_email(db, user.email)
         if existing_user:
-            metrics.increment_error()
             logger.warning(
-                f"Attempt to create user with existing email: {user.email}")
+                "Attempt to create user with existing email: %s", user.email)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
 
-    db_user = crud.create_user(db, user)
+    db_user = await async_crud.create_user(db, user)
     return db_user
 
 
 @app.get("/api/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get user by ID"""
-    metrics.increment_request()
-    db_user = crud.get_user_by_id(db, user_id)
+    db_user = await async_crud.get_user_by_id(db, user_id)
     if not db_user:
-        metrics.increment_error()
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 
 @app.get("/api/users", response_model=List[UserResponse])
-def get_all_users(db: Session = Depends(get_db)):
-    """Get all users"""
-    metrics.increment_request()
-    return crud.get_all_users(db)
+async def get_all_users():
+    """Get all users (streamed)"""
+    return StreamingResponse(
+        stream_json_array(USER_ROWS, async_crud.all_users_statement()),
+        media_type="application/json")
 
 
 @app.put("/api/users/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
-    """Update user profile"""
-    metrics.increment_request()
-    db_user = crud.update_user(db, user_id, user_update)
+async def update_user(user_id: int, user_update: UserUpdate,
+                      current_user_id: int = Depends(get_current_user_id),
+                      db: AsyncSession = Depends(get_async_db)):
+    """Update the current user's profile"""
+    if user_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Cannot edit another user's profile")
+    db_user = await async_crud.update_user(db, user_id, user_update)
     if not db_user:
-        metrics.increment_error()
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 
 @app.delete("/api/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    """Delete user"""
-    metrics.increment_request()
-    result = crud.delete_user(db, user_id)
+async def delete_user(user_id: int, current_user_id: int = Depends(get_current_user_id),
+                      db: AsyncSession = Depends(get_async_db)):
+    """Delete the current user's account"""
+    if user_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Cannot delete another user's account")
+    result = await async_crud.delete_user(db, user_id)
     if result == 0:
-        metrics.increment_error()
         raise HTTPException(status_code=404, detail="User not found")
+    forget_session(user_id)
 
 # ===== PROFILE ENDPOINTS =====
 
 
 @app.get("/api/profile/{user_id}", response_model=UserResponse)
-def get_profile(user_id: int, db: Session = Depends(get_db)):
+async def get_profile(user_id: int, request: Request, response: Response,
+                      db: AsyncSession = Depends(get_async_db)):
     """Get user profile"""
-    metrics.increment_request()
-    db_user = crud.get_user_by_id(db, user_id)
+    db_user = await async_crud.get_user_by_id(db, user_id)
     if not db_user:
-        metrics.increment_error()
         raise HTTPException(status_code=404, detail="User not found")
+    etag = etag_for_versions("profile", [(db_user.id, db_user.updated_at)])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
     return db_user
 
 
 @app.put("/api/profile/{user_id}", response_model=UserResponse)
-def update_profile(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
-    """Update user profile"""
-    metrics.increment_request()
-    db_user = crud.update_user(db, user_id, user_update)
+async def update_profile(user_id: int, user_update: UserUpdate,
+                         current_user_id: int = Depends(get_current_user_id),
+                         db: AsyncSession = Depends(get_async_db)):
+    """Update the current user's profile"""
+    if user_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Cannot edit another user's profile")
+    db_user = await async_crud.update_user(db, user_id, user_update)
     if not db_user:
-        metrics.increment_error()
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
@@ -240,155 +366,426 @@ def update_profile(user_id: int, user_update: UserUpdate, db: Session = Depends(
 
 
 @app.post("/api/events", response_model=EventResponse)
-def create_event(event: EventCreate, organizer_id: int, db: Session = Depends(get_db)):
-    """Create new event"""
-    metrics.increment_request()
+async def create_event(event: EventCreate, organizer_id: int = Depends(get_current_user_id),
+                       db: AsyncSession = Depends(get_async_db)):
+    """Create new event organized by the current user"""
+    try:
+        return await async_crud.create_event(db, event, organizer_id)
+    except Exception as e:
+        await db.rollback()
+        logger.error("Error creating event: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
 
+@app.post("/api/events/import", response_model=EventImportResponse)
+async def import_events(request: Request, organizer_id: int = Depends(get_current_user_id),
+                        db: AsyncSession = Depends(get_async_db)):
+    """Import events for the current user from a CSV (text/csv) or JSON lines upload.
+
+    The body is parsed while it streams in and all valid events are
+    created in one transaction; invalid lines are reported per item. A
+    body that is not UTF-8 imports nothing and answers 400.
+    """
+    items = iter_events(request.stream(), request.headers.get("content-type", ""))
     try:
-        db_event = Event(
-            title=event.title,
-            description=event.description or "",
-            event_type=event.event_type,
-            event_date=event.event_date,
-            location=event.location,
-            total_seats=event.total_seats,
-            available_seats=event.total_seats,
-            organizer_id=organizer_id,
-            created_at=datetime.utcnow()
-        )
-        db.add(db_event)
-        db.commit()
-        db.refresh(db_event)
+        results = await async_crud.import_events(db, items, organizer_id)
+    except ImportEncodingError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    if results is None:
+        raise HTTPException(status_code=404, detail="User not found")
 
-        organizer = crud.get_user_by_id(db, organizer_id)
-        if organizer:
-            db_event.organizer = organizer
+    created = sum(1 for _, event_id, _ in results if event_id)
+    return EventImportResponse(
+        created=created,
+        failed=len(results) - created,
+        results=[
+            EventImportItem(line=line, status="created" if event_id else "invalid",
+                            event_id=event_id, error=error)
+            for line, event_id, error in results
+        ]
+    )
+
+
+@app.get("/api/events/search", response_model=List[EventResponse])
+async def search_events(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=EVENTS_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search events by title, description and location, best match first.
+
+    Every word matches as a prefix. The offset of the next page is returned
+    in the X-Next-Offset header.
+    """
+    events, next_offset = await async_crud.search_events(db, q, limit, offset)
+    response = Response(content=EVENT_ROWS.dumps(events),
+                        media_type="application/json")
+    if next_offset is not None:
+        response.headers["X-Next-Offset"] = str(next_offset)
+    return response
 
-        logger.info(f"Event created: {db_event.title}")
-        return db_event
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error creating event: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/events/stream")
+async def stream_seat_updates(request: Request, ids: str = None):
+    """Server-sent events with live seat counts.
+
+    ids is a comma-separated list of event ids to follow (all events if
+    omitted). The stream starts with their current counts; after that,
+    changes arrive at most SEAT_UPDATES_PER_SECOND times a second.
+    """
+    event_ids = None
+    if ids:
+        try:
+            event_ids = {int(i) for i in ids.split(",") if i.strip()}
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids must be integers")
+        if len(event_ids) > SEAT_STREAM_MAX_IDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {SEAT_STREAM_MAX_IDS} events per stream")
+
+    snapshot = {}
+    if event_ids:
+        # Own session: a request-scoped one would stay open with the stream
+        async with AsyncSessionLocal() as db:
+            snapshot = await async_crud.get_seat_counts(db, event_ids)
+
+    subscriber = seat_broadcaster.subscribe(event_ids, snapshot)
+    return StreamingResponse(
+        seat_stream(subscriber, snapshot, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _fill_event(key, event_id, generation):
+    """Serialized event (None if missing), stored in the event cache.
+
+    Runs as a shared flight, so it uses its own session.
+    """
+    async with AsyncSessionLocal() as db:
+        db_event = await async_crud.get_event_by_id(db, event_id)
+        if not db_event:
+            return None
+        body = EventResponse.model_validate(db_event).model_dump_json().encode()
+    event_cache.set(key, body, generation)
+    return body
+
+
+async def _fill_events_page(key, generation, limit, filters):
+    """Packed listing page, stored in the event cache (shared flight)"""
+    async with AsyncSessionLocal() as db:
+        events, next_cursor = await async_crud.get_events_page(db, limit, **filters)
+    value = pack_page(EVENT_ROWS.dumps(events), next_cursor)
+    event_cache.set(key, value, generation)
+    return value
 
 
 @app.get("/api/events/{event_id}", response_model=EventResponse)
-def get_event(event_id: int, db: Session = Depends(get_db)):
-    """Get event by ID"""
-    metrics.increment_request()
-    db_event = crud.get_event_by_id(db, event_id)
-    if not db_event:
-        metrics.increment_error()
-        raise HTTPException(status_code=404, detail="Event not found")
-    return db_event
+async def get_event(event_id: int, request: Request):
+    """Get event by ID (served from the event cache when possible).
+
+    Concurrent misses for the same event share one fetch.
+    """
+    key = event_key(event_id)
+    body = event_cache.get(key)
+    if body is None:
+        generation = event_cache.generation()
+        body = await event_flights.do(
+            (key, generation), lambda: _fill_event(key, event_id, generation))
+        if body is None:
+            raise HTTPException(status_code=404, detail="Event not found")
+    etag = etag_for_bytes(body)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json",
+                    headers=cache_headers(etag))
 
 
 @app.get("/api/events", response_model=List[EventResponse])
-def get_all_events(event_type: str = None, db: Session = Depends(get_db)):
-    """Get all events (optionally by type)"""
-    metrics.increment_request()
-    if event_type:
-        return crud.get_events_by_type(db, event_type)
-    return crud.get_all_events(db)
+async def get_all_events(
+    request: Request,
+    event_type: str = None,
+    location: str = None,
+    date_from: datetime = None,
+    date_to: datetime = None,
+    has_seats: bool = None,
+    cursor: str = None,
+    limit: int = Query(EVENTS_PAGE_SIZE, ge=1, le=EVENTS_MAX_PAGE_SIZE)
+):
+    """Get a page of events ordered by date (optionally filtered).
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    Pages are served from the event cache when possible, and concurrent
+    misses for the same page share one fetch.
+    """
+    filters = dict(
+        cursor=cursor, date_from=date_from, date_to=date_to,
+        event_type=event_type, location=location, has_seats=has_seats
+    )
+    generation = event_cache.generation()
+    key = events_page_key(generation, limit=limit, **filters)
+    cached = event_cache.get(key)
+    if cached is None:
+        try:
+            cached = await event_flights.do(
+                key, lambda: _fill_events_page(key, generation, limit, filters))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    body, next_cursor = unpack_page(cached)
+
+    etag = etag_for_bytes(pack_page(body, next_cursor))
+    if etag_matches(request, etag):
+        response = not_modified(etag)
+    else:
+        response = Response(content=body, media_type="application/json",
+                            headers=cache_headers(etag))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
 
 
 @app.get("/api/events/user/{user_id}", response_model=List[EventResponse])
-def get_user_events(user_id: int, db: Session = Depends(get_db)):
-    """Get events organized by user"""
-    metrics.increment_request()
-    return crud.get_user_events(db, user_id)
+async def get_user_events(user_id: int, request: Request,
+                          db: AsyncSession = Depends(get_async_db)):
+    """Get events organized by user (304 if the version check matches)"""
+    versions = await async_crud.get_user_events_version(db, user_id)
+    etag = etag_for_versions("user-events", versions)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    events = await async_crud.get_user_events(db, user_id)
+    return Response(content=EVENT_ROWS.dumps(events), media_type="application/json",
+                    headers=cache_headers(etag))
+
+
+async def require_organizer(db: AsyncSession, event_id: int, current_user_id: int, action: str):
+    """404 if the event is missing, 403 unless the current user organizes it"""
+    event = await async_crud.get_event_organizer(db, event_id)
+    if event is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.organizer_id != current_user_id:
+        raise HTTPException(status_code=403, detail=f"Only the organizer can {action} the event")
 
 
 @app.put("/api/events/{event_id}", response_model=EventResponse)
-def update_event(event_id: int, event_update: EventUpdate, db: Session = Depends(get_db)):
-    """Update event"""
-    metrics.increment_request()
-    db_event = crud.update_event(db, event_id, event_update)
+async def update_event(event_id: int, event_update: EventUpdate,
+                       current_user_id: int = Depends(get_current_user_id),
+                       db: AsyncSession = Depends(get_async_db)):
+    """Update the current user's event (409 if total_seats is below the registrations)"""
+    await require_organizer(db, event_id, current_user_id, "edit")
+    try:
+        db_event = await async_crud.update_event(db, event_id, event_update)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not db_event:
-        metrics.increment_error()
         raise HTTPException(status_code=404, detail="Event not found")
     return db_event
 
 
 @app.delete("/api/events/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_event(event_id: int, db: Session = Depends(get_db)):
-    """Delete event"""
-    metrics.increment_request()
-    result = crud.delete_event(db, event_id)
+async def delete_event(event_id: int, current_user_id: int = Depends(get_current_user_id),
+                       db: AsyncSession = Depends(get_async_db)):
+    """Delete the current user's event"""
+    await require_organizer(db, event_id, current_user_id, "delete")
+    result = await async_crud.delete_event(db, event_id)
     if result == 0:
-        metrics.increment_error()
         raise HTTPException(status_code=404, detail="Event not found")
 
 # ===== REGISTRATION ENDPOINTS =====
 
 
 @app.post("/api/registrations", response_model=RegistrationResponse, status_code=status.HTTP_201_CREATED)
-def register_for_event(reg: RegistrationCreate, user_id: int, db: Session = Depends(get_db)):
-    """Register user for event"""
-    metrics.increment_request()
-
-    user = crud.get_user_by_id(db, user_id)
-    if not user:
-        metrics.increment_error()
-        raise HTTPException(status_code=404, detail="User not found")
-
-    registration = crud.register_user_for_event(db, user_id, reg.event_id)
-    if not registration:
-        metrics.increment_error()
+async def register_for_event(reg: RegistrationCreate, user_id: int = Depends(get_current_user_id),
+                             db: AsyncSession = Depends(get_async_db)):
+    """Register the current user for event; a sold-out event puts them on its waitlist (202)"""
+    result, registration = await async_crud.reserve_seat(db, user_id, reg.event_id)
+    if result == ReservationStatus.SOLD_OUT:
+        result, registration = await async_crud.join_waitlist(db, user_id, reg.event_id)
+    if result == ReservationStatus.EVENT_NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if result == ReservationStatus.WAITLISTED:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=jsonable_encoder(await waitlist_response(db, registration))
+        )
+    if result == ReservationStatus.DUPLICATE:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Registration failed (no seats available or already registered)"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Already registered for this event"
         )
 
     metrics.increment_registration()
     return registration
 
 
+@app.post("/api/registrations/bulk", response_model=BulkRegistrationResponse)
+async def bulk_register_for_event(bulk: BulkRegistrationCreate,
+                                  current_user_id: int = Depends(get_current_user_id),
+                                  db: AsyncSession = Depends(get_async_db)):
+    """Register many users for the current user's event in one transaction"""
+    event = await async_crud.get_event_organizer(db, bulk.event_id)
+    if event is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.organizer_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Only the organizer can register users in bulk")
+    result, items = await async_crud.bulk_reserve_seats(db, bulk.event_id, bulk.user_ids)
+    if result == ReservationStatus.EVENT_NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    registered = sum(1 for _, status, _ in items if status == ReservationStatus.OK)
+    if registered:
+        metrics.increment_registration(registered)
+    return BulkRegistrationResponse(
+        event_id=bulk.event_id,
+        registered=registered,
+        results=[
+            BulkRegistrationItem(user_id=user_id, status=status.value,
+                                 registration_id=registration_id)
+            for user_id, status, registration_id in items
+        ]
+    )
+
+
 @app.get("/api/registrations/user/{user_id}", response_model=List[RegistrationWithEventResponse])
-def get_user_registrations(user_id: int, db: Session = Depends(get_db)):
-    """Get user registrations"""
-    metrics.increment_request()
+async def get_user_registrations(user_id: int, request: Request,
+                                 db: AsyncSession = Depends(get_async_db)):
+    """Get user registrations (304 if the version check matches)"""
     try:
-        registrations = crud.get_user_registrations(db, user_id)
-
-        if not registrations:
-            return []
-
-        result = []
-        for reg in registrations:
-            event = crud.get_event_by_id(db, reg.event_id)
-            if event:
-                reg_dict = {
-                    "id": reg.id,
-                    "user_id": reg.user_id,
-                    "event_id": reg.event_id,
-                    "registered_at": reg.registered_at,
-                    "event": event
-                }
-                result.append(reg_dict)
-        return result
+        versions = await async_crud.get_user_registrations_version(db, user_id)
+        etag = etag_for_versions("user-registrations", versions)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        registrations = await async_crud.get_user_registrations(db, user_id)
+        return Response(content=REGISTRATION_WITH_EVENT_ROWS.dumps(registrations),
+                        media_type="application/json", headers=cache_headers(etag))
     except Exception as e:
-        logger.error(f"Error getting registrations: {e}")
+        logger.error("Error getting registrations: %s", e)
         raise HTTPException(
             status_code=500, detail="Error loading registrations")
 
 
 @app.get("/api/registrations/event/{event_id}", response_model=List[RegistrationResponse])
-def get_event_registrations(event_id: int, db: Session = Depends(get_db)):
-    """Get all registrations for event"""
-    metrics.increment_request()
-    return crud.get_event_registrations(db, event_id)
+async def get_event_registrations(event_id: int):
+    """Get all registrations for event (streamed)"""
+    return StreamingResponse(
+        stream_json_array(REGISTRATION_ROWS,
+                          async_crud.event_registrations_statement(event_id)),
+        media_type="application/json")
 
 
 @app.delete("/api/registrations/{registration_id}", status_code=status.HTTP_204_NO_CONTENT)
-def cancel_registration(registration_id: int, db: Session = Depends(get_db)):
-    """Cancel registration"""
-    metrics.increment_request()
-    result = crud.cancel_registration(db, registration_id)
+async def cancel_registration(registration_id: int,
+                              current_user_id: int = Depends(get_current_user_id),
+                              db: AsyncSession = Depends(get_async_db)):
+    """Cancel registration (its user or the event's organizer)"""
+    owners = await async_crud.get_registration_owners(db, registration_id)
+    if owners is None:
+        raise HTTPException(status_code=404, detail="Registration not found")
+    if current_user_id not in (owners.user_id, owners.organizer_id):
+        raise HTTPException(status_code=403, detail="Cannot cancel another user's registration")
+    result = await async_crud.cancel_registration(db, registration_id)
     if result == 0:
-        metrics.increment_error()
         raise HTTPException(status_code=404, detail="Registration not found")
 
+# ===== WAITLIST ENDPOINTS =====
+
+
+async def waitlist_response(db: AsyncSession, entry):
+    position = await async_crud.get_waitlist_position(db, entry)
+    return WaitlistResponse(id=entry.id, event_id=entry.event_id, user_id=entry.user_id,
+                            position=position, joined_at=entry.joined_at)
+
+
+@app.get("/api/waitlist/user/{user_id}", response_model=List[WaitlistResponse])
+async def get_user_waitlist(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the events a user is waiting for, with their place in each queue"""
+    rows = await async_crud.get_user_waitlist(db, user_id)
+    return [
+        WaitlistResponse(id=entry.id, event_id=entry.event_id, user_id=entry.user_id,
+                         position=position, joined_at=entry.joined_at)
+        for entry, position in rows
+    ]
+
+
+@app.delete("/api/waitlist/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def leave_waitlist(entry_id: int, current_user_id: int = Depends(get_current_user_id),
+                         db: AsyncSession = Depends(get_async_db)):
+    """Leave a waitlist (its user or the event's organizer)"""
+    owners = await async_crud.get_waitlist_entry_owners(db, entry_id)
+    if owners is None:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    if current_user_id not in (owners.user_id, owners.organizer_id):
+        raise HTTPException(status_code=403, detail="Cannot remove another user's waitlist entry")
+    result = await async_crud.leave_waitlist(db, entry_id)
+    if result == 0:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+
+# ===== STATS ENDPOINTS =====
+
+
+@app.get("/api/stats", response_model=StatsResponse)
+async def get_stats(db: AsyncSession = Depends(get_async_db)):
+    """Event and registration totals, overall and per event type.
+
+    Read from counters maintained on every write, so the cost does not
+    grow with the number of registrations.
+    """
+    event_types = [
+        EventTypeStatsResponse(event_type=row.event_type, events=row.events_count,
+                               registrations=row.registrations_count)
+        for row in await async_crud.get_stats(db)
+        if row.events_count
+    ]
+    return StatsResponse(
+        events=sum(t.events for t in event_types),
+        registrations=sum(t.registrations for t in event_types),
+        event_types=event_types
+    )
+
+
+@app.get("/api/stats/user/{user_id}", response_model=UserStatsResponse)
+async def get_user_stats(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Number of registrations and organized events of a user"""
+    counts = await async_crud.get_user_stats(db, user_id)
+    if counts is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    registrations, events = counts
+    return UserStatsResponse(user_id=user_id, registrations=registrations, events=events)
+
+# ===== DASHBOARD ENDPOINTS =====
+
+
+@app.get("/api/dashboard/{user_id}", response_model=DashboardResponse)
+async def get_dashboard(user_id: int, request: Request,
+                        db: AsyncSession = Depends(get_async_db)):
+    """Profile, counts, registrations and organized events of a user.
+
+    The profile page's single request. Five queries whatever the list
+    lengths: the profile row and the version rows of both lists, then,
+    unless the ETag matches, the rows of both lists.
+    """
+    profile = await async_crud.get_dashboard_profile(db, user_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    registration_versions = await async_crud.get_user_registrations_version(db, user_id)
+    event_versions = await async_crud.get_user_events_version(db, user_id)
+    etag = etag_for_versions(
+        "dashboard", [(user_id, *profile[-3:]), *registration_versions, *event_versions])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    registrations = await async_crud.get_user_registrations(db, user_id)
+    events = await async_crud.get_user_events(db, user_id)
+    return Response(content=dashboard_json(profile, registrations, events),
+                    media_type="application/json", headers=cache_headers(etag))
+
+# ===== FRONTEND =====
+
+# Mounted at "/", so it must stay after every API route
+if FRONTEND_DIST:
+    app.mount("/", FrontendFiles(directory=FRONTEND_DIST, html=True), name="frontend")
+
 
 # ===== RUN =====
 if __name__ == "__main__":
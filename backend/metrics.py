@@ -1,48 +1,247 @@
 from datetime import datetime
 from collections import defaultdict
+import math
+import os
+import threading
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+
+from logging_config import queue_handler
+
+# When uvicorn runs several workers, each one writes its samples to mmap'd
+# files in this directory and /metrics aggregates them on read. The
+# directory must exist and be emptied before the workers start.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+REQUESTS = Counter(
+    "innoevent_requests_total",
+    "HTTP requests by route template and status code",
+    ["endpoint", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "innoevent_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["endpoint"],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "innoevent_requests_in_progress",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum"
+)
+REGISTRATIONS = Counter(
+    "innoevent_registrations_total",
+    "Successful event registrations"
+)
+SEAT_SUBSCRIBERS = Gauge(
+    "innoevent_seat_subscribers",
+    "Open seat-availability streams",
+    multiprocess_mode="livesum"
+)
+CACHE_OPERATIONS = Counter(
+    "innoevent_cache_operations_total",
+    "Cache lookups and evictions by cache and result (hit, miss, eviction)",
+    ["cache", "result"]
+)
+COALESCED_REQUESTS = Counter(
+    "innoevent_coalesced_requests_total",
+    "Requests served by another request's in-flight fetch, by flight group",
+    ["group"]
+)
+
+
+class LatencyHistogram:
+    """Fixed-memory log-bucketed latency histogram.
+
+    Bucket i covers [MIN_MS * GROWTH**i, MIN_MS * GROWTH**(i+1)), so any
+    percentile is reported with a relative error of at most GROWTH - 1.
+    Recording is O(1) and reading a percentile is O(buckets).
+    """
+    MIN_MS = 0.01
+    MAX_MS = 120_000.0
+    GROWTH = 1.05
+    _LOG_GROWTH = math.log(GROWTH)
+    BUCKETS = int(math.log(MAX_MS / MIN_MS) / _LOG_GROWTH) + 1
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value):
+        if value <= self.MIN_MS:
+            return 0
+        index = int(math.log(value / self.MIN_MS) / self._LOG_GROWTH)
+        return min(index, self.BUCKETS - 1)
+
+    def record(self, value):
+        self.counts[self._bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentiles(self, quantiles):
+        """Return {q: value} for sorted quantiles in a single bucket scan"""
+        result = {}
+        if not self.count:
+            return {q: 0.0 for q in quantiles}
+        pending = list(quantiles)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            while pending and seen >= pending[0] * self.count:
+                upper = self.MIN_MS * self.GROWTH ** (index + 1)
+                result[pending.pop(0)] = min(max(upper, self.min), self.max)
+            if not pending:
+                break
+        for q in pending:
+            result[q] = self.max
+        return result
+
+    def summary(self):
+        p = self.percentiles(Metrics.QUANTILES)
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count, 2) if self.count else 0,
+            'max_ms': round(self.max or 0, 2),
+            'p50_ms': round(p[0.5], 2),
+            'p90_ms': round(p[0.9], 2),
+            'p99_ms': round(p[0.99], 2),
+            'p999_ms': round(p[0.999], 2),
+        }
 
 
 class Metrics:
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
     def __init__(self):
+        self._lock = threading.Lock()
         self.total_requests = 0
         self.total_errors = 0
         self.total_registrations = 0
         self.requests_by_endpoint = defaultdict(int)
         self.errors_by_type = defaultdict(int)
-        self.response_times = []
+        self.latency = LatencyHistogram()
+        self.latency_by_endpoint = defaultdict(LatencyHistogram)
+        self.latency_by_status = defaultdict(LatencyHistogram)
+        self.cache = defaultdict(lambda: defaultdict(int))
+        self.coalesced = defaultdict(int)
         self.start_time = datetime.utcnow()
 
     def increment_request(self, endpoint=None):
-        self.total_requests += 1
-        if endpoint:
-            self.requests_by_endpoint[endpoint] += 1
+        with self._lock:
+            self.total_requests += 1
+            if endpoint:
+                self.requests_by_endpoint[endpoint] += 1
 
     def increment_error(self, error_type='unknown'):
-        self.total_errors += 1
-        self.errors_by_type[error_type] += 1
+        with self._lock:
+            self.total_errors += 1
+            self.errors_by_type[error_type] += 1
+
+    def increment_registration(self, count=1):
+        with self._lock:
+            self.total_registrations += count
+        REGISTRATIONS.inc(count)
+
+    def record_cache(self, cache, result):
+        """Count a cache hit, miss or eviction"""
+        with self._lock:
+            self.cache[cache][result] += 1
+        CACHE_OPERATIONS.labels(cache, result).inc()
+
+    def record_coalesced(self, group):
+        """Count a request that joined an in-flight fetch"""
+        with self._lock:
+            self.coalesced[group] += 1
+        COALESCED_REQUESTS.labels(group).inc()
+
+    def add_response_time(self, time_ms, endpoint=None, status_code=None):
+        with self._lock:
+            self.latency.record(time_ms)
+            if endpoint:
+                self.latency_by_endpoint[endpoint].record(time_ms)
+            if status_code:
+                self.latency_by_status[str(status_code)].record(time_ms)
 
-    def increment_registration(self):
-        self.total_registrations += 1
+    def record_request(self, endpoint, status_code, time_ms):
+        """Record a finished request: counters and latency histograms.
 
-    def add_response_time(self, time_ms):
-        self.response_times.append(time_ms)
+        endpoint should be a route template (e.g. 'GET /api/events/{event_id}')
+        so the number of tracked series stays bounded.
+        """
+        self.increment_request(endpoint)
+        if status_code >= 400:
+            self.increment_error(str(status_code))
+        self.add_response_time(time_ms, endpoint, status_code)
+        REQUESTS.labels(endpoint, str(status_code)).inc()
+        REQUEST_DURATION.labels(endpoint).observe(time_ms / 1000)
 
     def get_metrics(self):
         uptime_seconds = (datetime.utcnow() - self.start_time).total_seconds()
-        avg_response_time = sum(
-            self.response_times) / len(self.response_times) if self.response_times else 0
+
+        with self._lock:
+            latency = self.latency.summary()
+            latency_by_endpoint = {
+                endpoint: hist.summary()
+                for endpoint, hist in self.latency_by_endpoint.items()
+            }
+            latency_by_status = {
+                code: hist.summary()
+                for code, hist in self.latency_by_status.items()
+            }
+            total_requests = self.total_requests
+            total_errors = self.total_errors
+            requests_by_endpoint = dict(self.requests_by_endpoint)
+            errors_by_type = dict(self.errors_by_type)
+            cache = {name: dict(counts) for name, counts in self.cache.items()}
+            coalesced = dict(self.coalesced)
 
         return {
             'uptime_seconds': round(uptime_seconds, 2),
-            'total_requests': self.total_requests,
-            'total_errors': self.total_errors,
-            'error_rate': round((self.total_errors / self.total_requests * 100) if self.total_requests > 0 else 0, 2),
+            'total_requests': total_requests,
+            'total_errors': total_errors,
+            'error_rate': round((total_errors / total_requests * 100) if total_requests > 0 else 0, 2),
             'total_registrations': self.total_registrations,
-            'avg_response_time_ms': round(avg_response_time, 2),
-            'requests_by_endpoint': dict(self.requests_by_endpoint),
-            'errors_by_type': dict(self.errors_by_type),
+            'avg_response_time_ms': latency['avg_ms'],
+            'response_time_ms': latency,
+            'response_time_by_endpoint': latency_by_endpoint,
+            'response_time_by_status': latency_by_status,
+            'requests_by_endpoint': requests_by_endpoint,
+            'errors_by_type': errors_by_type,
+            'cache': cache,
+            'coalesced_requests': coalesced,
+            'log_records_dropped': queue_handler.dropped,
             'timestamp': datetime.utcnow().isoformat()
         }
 
 
+def prometheus_exposition():
+    """Render metrics in Prometheus text format.
+
+    Returns (body, content_type). In multi-worker mode the samples of all
+    workers are merged from PROMETHEUS_MULTIPROC_DIR.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid=None):
+    """Drop live gauges of an exiting worker from the shared store"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
 metrics = Metrics()
@@ -0,0 +1,246 @@
+"""Versioned schema migrations.
+
+Every database records the migrations applied to it in schema_migrations.
+migrate() applies the missing ones in order. At startup the app either
+runs it (DB_AUTO_MIGRATE=true, the default) or only checks that nothing
+is pending and refuses to start otherwise. With several workers, migrate
+once before starting them, as the Dockerfile does. From the backend
+directory:
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # list them (exit code 1 if any pending)
+
+Concurrent runs are serialized by a Postgres advisory lock, or by a lock
+file next to the SQLite database. The runner that waited finds nothing
+left to do.
+
+Version 1 creates the tables of models.py, so a new database gets the
+current schema at once and the later migrations find their work done.
+Every migration must therefore be a no-op on a schema that already has
+its change (IF NOT EXISTS, inspector checks). Databases created before
+migrations existed are adopted the same way.
+
+Indexes are built online where the database allows it: Postgres uses
+CREATE INDEX CONCURRENTLY, which does not block writes. SQLite has no
+such option and holds the write lock while it builds an index (about a
+second per million rows).
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import select, insert, delete, inspect, func, text
+
+from database import Base, add_missing_columns
+from models import Registration, SchemaMigration
+from search import setup_search_index
+from aggregates import ensure_aggregates, check_aggregates
+from logging_config import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: SQLite runs are not locked
+    fcntl = None
+
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+
+# Postgres advisory lock held while migrating
+MIGRATION_LOCK_KEY = 4_211_873
+
+
+def _baseline(bind):
+    """Tables of models.py, and the nullable columns older tables lack"""
+    Base.metadata.create_all(bind=bind)
+    add_missing_columns(bind)
+
+
+def _has_unique(bind, table, columns):
+    inspector = inspect(bind)
+    wanted = set(columns)
+    return (
+        any(set(c["column_names"]) == wanted
+            for c in inspector.get_unique_constraints(table))
+        or any(i["unique"] and set(i["column_names"]) == wanted
+               for i in inspector.get_indexes(table))
+    )
+
+
+def _create_index(bind, name, table, columns, unique=False):
+    """CREATE INDEX IF NOT EXISTS, without blocking writes on Postgres"""
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    if bind.dialect.name != "postgresql":
+        with bind.begin() as conn:
+            conn.execute(text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns})"))
+        return
+
+    with bind.connect() as conn:
+        # CONCURRENTLY cannot run inside a transaction
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        # An interrupted concurrent build leaves an invalid index behind
+        invalid = conn.scalar(text(
+            "SELECT NOT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+            {"name": name})
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY {name}"))
+        conn.execute(text(
+            f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _unique_registrations(bind):
+    """uq_registrations_user_event for tables created before it existed.
+
+    Duplicate registrations are dropped first (the oldest one stays) and
+    the counts they inflated are recomputed. A duplicate committed during
+    the index build fails the migration; running it again removes it.
+    """
+    first = (select(func.min(Registration.id))
+             .group_by(Registration.user_id, Registration.event_id))
+    with bind.begin() as conn:
+        removed = conn.execute(
+            delete(Registration).where(
+                Registration.id.notin_(first),
+                Registration.user_id.isnot(None), Registration.event_id.isnot(None))
+        ).rowcount
+    if removed:
+        logger.warning("Removed %s duplicate registrations", removed)
+        check_aggregates(bind, repair=True)
+
+    _create_index(bind, "uq_registrations_user_event", "registrations",
+                  "user_id, event_id", unique=True)
+    if bind.dialect.name == "postgresql":
+        with bind.begin() as conn:
+            conn.execute(text(
+                "ALTER TABLE registrations ADD CONSTRAINT uq_registrations_user_event "
+                "UNIQUE USING INDEX uq_registrations_user_event"))
+
+
+def _lookup_indexes(bind):
+    """Indexes for the registrations of an event and the events of an
+    organizer. A user's registrations use the unique (user_id, event_id)
+    index, and the listing filters by type and date use the composite
+    listing indexes (migration 5), so those need none of their own."""
+    if not _has_unique(bind, "registrations", ("user_id", "event_id")):
+        _unique_registrations(bind)
+    _create_index(bind, "ix_registrations_event_id", "registrations", "event_id")
+    _create_index(bind, "ix_events_organizer_date", "events", "organizer_id, event_date")
+
+
+def _listing_indexes(bind):
+    """Keyset pagination, listing filter and change feed indexes of events.
+
+    models.py declares them, but the baseline's create_all only adds them
+    to new tables, so databases older than the listing work lack them.
+    """
+    _create_index(bind, "ix_events_date_id", "events", "event_date, id")
+    _create_index(bind, "ix_events_type_date_id", "events", "event_type, event_date, id")
+    _create_index(bind, "ix_events_location_date_id", "events", "location, event_date, id")
+    _create_index(bind, "ix_events_seats_date_id", "events",
+                  "available_seats, event_date, id")
+    _create_index(bind, "ix_events_updated_at", "events", "updated_at")
+
+
+# (version, name, upgrade(bind)); append only, never renumber
+MIGRATIONS = [
+    (1, "baseline", _baseline),
+    (2, "search index", setup_search_index),
+    (3, "aggregate counters", ensure_aggregates),
+    (4, "lookup indexes", _lookup_indexes),
+    (5, "listing indexes", _listing_indexes),
+]
+
+
+@contextmanager
+def _migration_lock(bind):
+    """Hold the lock that serializes migration runs"""
+    dialect = bind.dialect.name
+    database = bind.url.database
+    if dialect == "postgresql":
+        with bind.connect() as conn:
+            # Autocommit: an open transaction would stall concurrent index builds
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"),
+                             {"key": MIGRATION_LOCK_KEY})
+    elif dialect == "sqlite" and fcntl is not None and database not in (None, "", ":memory:"):
+        with open(database + ".migrate.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+    else:
+        yield
+
+
+def applied_versions(bind):
+    """Versions recorded in schema_migrations"""
+    if not inspect(bind).has_table(SchemaMigration.__tablename__):
+        return set()
+    with bind.connect() as conn:
+        return set(conn.scalars(select(SchemaMigration.version)))
+
+
+def pending_migrations(bind):
+    """(version, name) of the migrations not applied yet"""
+    applied = applied_versions(bind)
+    return [(version, name) for version, name, _ in MIGRATIONS if version not in applied]
+
+
+def migrate(bind, target=None):
+    """Apply the pending migrations up to target (default: all) in order.
+
+    Returns the versions applied by this call.
+    """
+    done = []
+    with _migration_lock(bind):
+        SchemaMigration.__table__.create(bind=bind, checkfirst=True)
+        applied = applied_versions(bind)
+        for version, name, upgrade in MIGRATIONS:
+            if version in applied or (target is not None and version > target):
+                continue
+            start = time.perf_counter()
+            upgrade(bind)
+            with bind.begin() as conn:
+                conn.execute(insert(SchemaMigration).values(version=version, name=name))
+            logger.info("Migration %s (%s) applied in %.1fs",
+                        version, name, time.perf_counter() - start)
+            done.append(version)
+    return done
+
+
+def check_schema(bind):
+    """Raise if the database lacks migrations this code expects"""
+    pending = pending_migrations(bind)
+    if pending:
+        raise RuntimeError(
+            "Database schema is out of date, pending migrations: "
+            + ", ".join(f"{version} ({name})" for version, name in pending)
+            + ". Run `python migrations.py` from the backend directory.")
+    unknown = applied_versions(bind) - {version for version, _, _ in MIGRATIONS}
+    if unknown:
+        logger.warning("Database has migrations this code does not know: %s",
+                       sorted(unknown))
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Apply the schema migrations")
+    parser.add_argument("--status", action="store_true",
+                        help="list the migrations without applying them")
+    args = parser.parse_args()
+
+    if args.status:
+        applied = applied_versions(engine)
+        for version, name, _ in MIGRATIONS:
+            state = "applied" if version in applied else "pending"
+            print(f"{version:>3}  {name:<20} {state}")
+        if pending_migrations(engine):
+            sys.exit(1)
+    else:
+        versions = migrate(engine)
+        print(f"{len(versions)} migrations applied")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -15,6 +15,12 @@ class User(Base):
     email = Column(String(100), unique=True, nullable=True)
     password = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow,
+                        onupdate=datetime.utcnow)  # ETag version
+    token_version = Column(Integer, default=0)  # bumped to revoke sessions
+    # Maintained by the crud write paths (see aggregates.py)
+    registrations_count = Column(Integer, default=0)
+    events_count = Column(Integer, default=0)
 
     # Relationships
     organized_events = relationship("Event", back_populates="organizer")
@@ -24,6 +30,17 @@ class User(Base):
 class Event(Base):
     """Event table"""
     __tablename__ = "events"
+    __table_args__ = (
+        # Keyset pagination order and the listing filters
+        Index("ix_events_date_id", "event_date", "id"),
+        Index("ix_events_type_date_id", "event_type", "event_date", "id"),
+        Index("ix_events_location_date_id", "location", "event_date", "id"),
+        Index("ix_events_seats_date_id", "available_seats", "event_date", "id"),
+        # Change feed for the seat stream
+        Index("ix_events_updated_at", "updated_at"),
+        # A user's organized events
+        Index("ix_events_organizer_date", "organizer_id", "event_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -35,6 +52,8 @@ class Event(Base):
     available_seats = Column(Integer, nullable=False)  # ✅ Добавь как Column!
     organizer_id = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow,
+                        onupdate=datetime.utcnow)  # ETag version
 
     # Relationships
     organizer = relationship("User", back_populates="organized_events")
@@ -44,6 +63,13 @@ class Event(Base):
 class Registration(Base):
     """Registration table"""
     __tablename__ = "registrations"
+    __table_args__ = (
+        # Also the index for a user's registrations
+        UniqueConstraint("user_id", "event_id",
+                         name="uq_registrations_user_event"),
+        # Registrations of an event
+        Index("ix_registrations_event_id", "event_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -53,3 +79,39 @@ class Registration(Base):
     # Relationships
     user = relationship("User", back_populates="registrations")
     event = relationship("Event", back_populates="registrations")
+
+
+class WaitlistEntry(Base):
+    """Waitlist table: users queued for a sold-out event"""
+    __tablename__ = "waitlist_entries"
+    __table_args__ = (
+        UniqueConstraint("event_id", "user_id",
+                         name="uq_waitlist_event_user"),
+        # FIFO order; the head of an event's queue is one index seek
+        UniqueConstraint("event_id", "position",
+                         name="uq_waitlist_event_position"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    joined_at = Column(DateTime, default=datetime.utcnow)
+
+
+class EventTypeStats(Base):
+    """Per event type totals, maintained by the crud write paths"""
+    __tablename__ = "event_type_stats"
+
+    event_type = Column(String(50), primary_key=True)
+    events_count = Column(Integer, nullable=False, default=0)
+    registrations_count = Column(Integer, nullable=False, default=0)
+
+
+class SchemaMigration(Base):
+    """Applied schema migrations (see migrations.py)"""
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
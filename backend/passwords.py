@@ -0,0 +1,97 @@
+"""Password hashing with scrypt, verified off the event loop.
+
+Hashes are stored as "scrypt$n$r$p$salt$hash" (base64 salt and hash).
+Rows written before hashing was introduced hold the plain password; they
+still verify, and login replaces them with a hash (as it does for hashes
+made with an older cost).
+
+scrypt releases the GIL, so hashing runs in a dedicated thread pool
+sized to the CPUs. When more than PASSWORD_QUEUE_LIMIT operations are
+queued or running, new ones fail fast with PasswordPoolBusy instead of
+piling up behind a login storm.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Cost: memory = 128 * r * n bytes per hash (16 MiB by default)
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", 2 ** 14))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", 8))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", 1))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", PASSWORD_HASH_WORKERS * 16))
+
+SALT_BYTES = 16
+HASH_BYTES = 32
+PREFIX = "scrypt"
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * r * n, dklen=HASH_BYTES)
+
+
+def hash_password(password: str):
+    """Hash password with the configured cost"""
+    salt = os.urandom(SALT_BYTES)
+    n, r, p = PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P
+    digest = _scrypt(password, salt, n, r, p)
+    return "$".join([PREFIX, str(n), str(r), str(p),
+                     base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+
+def verify_password(password: str, stored: str):
+    """Check password against a stored value.
+
+    Returns (matches, needs_rehash); needs_rehash is set for plain-text
+    rows and hashes made with a different cost.
+    """
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != PREFIX:
+        matches = hmac.compare_digest(password.encode(), stored.encode())
+        return matches, matches
+
+    n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+    digest = _scrypt(password, base64.b64decode(parts[4]), n, r, p)
+    matches = hmac.compare_digest(digest, base64.b64decode(parts[5]))
+    current = (n, r, p) == (PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+    return matches, matches and not current
+
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS,
+                               thread_name_prefix="password")
+_pending = 0
+
+
+async def _submit(fn, *args):
+    # Only the event loop thread touches _pending
+    global _pending
+    if _pending >= PASSWORD_QUEUE_LIMIT:
+        raise PasswordPoolBusy()
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str):
+    """hash_password in the hashing pool; raises PasswordPoolBusy"""
+    return await _submit(hash_password, password)
+
+
+async def verify_password_async(password: str, stored: str):
+    """verify_password in the hashing pool; raises PasswordPoolBusy"""
+    return await _submit(verify_password, password, stored)
+
+
+def pending():
+    """Hashing operations queued or running in this process"""
+    return _pending
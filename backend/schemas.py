@@ -36,6 +36,12 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class LoginResponse(UserResponse):
+    """Пользователь и токен сессии"""
+    access_token: str
+    token_type: str = "bearer"
+
+
 # ===== EVENT SCHEMAS =====
 class EventCreate(BaseModel):
     """Схема для создания события"""
@@ -95,3 +101,79 @@ class RegistrationResponse(BaseModel):
 class RegistrationWithEventResponse(RegistrationResponse):
     """Регистрация с информацией о событии"""
     event: EventResponse
+
+
+class WaitlistResponse(BaseModel):
+    """Схема ответа для записи в лист ожидания"""
+    id: int
+    event_id: int
+    user_id: int
+    position: int  # место в очереди, начиная с 1
+    joined_at: datetime
+
+
+class BulkRegistrationCreate(BaseModel):
+    """Схема для массовой регистрации пользователей на событие"""
+    event_id: int
+    user_ids: List[int]
+
+
+class BulkRegistrationItem(BaseModel):
+    """Результат регистрации одного пользователя"""
+    user_id: int
+    status: str  # ok, sold_out, duplicate, user_not_found
+    registration_id: Optional[int] = None
+
+
+class BulkRegistrationResponse(BaseModel):
+    """Схема ответа для массовой регистрации"""
+    event_id: int
+    registered: int
+    results: List[BulkRegistrationItem]
+
+
+# ===== IMPORT SCHEMAS =====
+class EventImportItem(BaseModel):
+    """Результат импорта одной строки"""
+    line: int
+    status: str  # created, invalid
+    event_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class EventImportResponse(BaseModel):
+    """Схема ответа для импорта событий"""
+    created: int
+    failed: int
+    results: List[EventImportItem]
+
+
+# ===== STATS SCHEMAS =====
+class EventTypeStatsResponse(BaseModel):
+    """Итоги по одному типу событий"""
+    event_type: str
+    events: int
+    registrations: int
+
+
+class StatsResponse(BaseModel):
+    """Схема ответа для общей статистики"""
+    events: int
+    registrations: int
+    event_types: List[EventTypeStatsResponse]
+
+
+class UserStatsResponse(BaseModel):
+    """Схема ответа для статистики пользователя"""
+    user_id: int
+    registrations: int
+    events: int
+
+
+# ===== DASHBOARD SCHEMAS =====
+class DashboardResponse(BaseModel):
+    """Схема ответа для личного кабинета: профиль, счётчики и оба списка"""
+    profile: UserResponse
+    stats: UserStatsResponse
+    registrations: List[RegistrationWithEventResponse]
+    events: List[EventResponse]
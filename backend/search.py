@@ -0,0 +1,121 @@
+"""Full-text search over event title, description and location.
+
+SQLite keeps an FTS5 table (events_fts) that mirrors the events table
+through triggers. Postgres uses a generated tsvector column with a GIN
+index. Either way the index follows every insert, update and delete,
+including bulk and Core statements. Other databases fall back to LIKE.
+
+Queries are split into words and every word is matched as a prefix, so
+"pyth meet" finds "Python Meetup". Results are ordered by relevance, and
+title hits weigh more than location hits, which weigh more than
+description hits.
+"""
+import re
+
+from sqlalchemy import select, func, table, column, literal_column, or_, text
+from sqlalchemy.orm import joinedload
+
+from models import Event
+from logging_config import logger
+
+# bm25 column weights for (title, description, location)
+SQLITE_WEIGHTS = (10.0, 1.0, 5.0)
+
+_SQLITE_SETUP = [
+    # Triggers go away with the events table; start over if they are gone
+    "DROP TABLE IF EXISTS events_fts",
+    """CREATE VIRTUAL TABLE events_fts USING fts5(
+        title, description, location,
+        content='events', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # Seat and timestamp updates leave the indexed text alone
+    """CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END""",
+    """CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+    END""",
+    """CREATE TRIGGER events_fts_update
+        AFTER UPDATE OF title, description, location ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+        INSERT INTO events_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END""",
+    # Index events that existed before the search table
+    "INSERT INTO events_fts(events_fts) VALUES ('rebuild')",
+]
+
+_POSTGRES_SETUP = [
+    """ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(location, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_events_search ON events USING GIN (search_vector)",
+]
+
+events_fts = table("events_fts", column("rowid"))
+
+
+def setup_search_index(bind):
+    """Create the search index for bind's database if it is missing"""
+    dialect = bind.dialect.name
+    if dialect == "sqlite":
+        with bind.connect() as conn:
+            if conn.scalar(text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' "
+                                "AND name = 'events_fts_insert'")):
+                return
+        statements = _SQLITE_SETUP
+    elif dialect == "postgresql":
+        statements = _POSTGRES_SETUP
+    else:
+        logger.warning("No full-text index for %s, search falls back to LIKE", dialect)
+        return
+
+    with bind.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+    logger.info("Search index ready (%s)", dialect)
+
+
+def search_terms(query: str):
+    """Words of a user query; punctuation and operators are dropped"""
+    return re.findall(r"\w+", query.lower())
+
+
+def search_statement(dialect: str, terms, limit: int, offset: int = 0, base=None):
+    """SELECT for one page of events matching all terms, best match first.
+
+    base replaces the default SELECT of events with their organizers.
+    """
+    stmt = base if base is not None else select(Event).options(joinedload(Event.organizer))
+
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        rank = func.bm25(literal_column("events_fts"), *SQLITE_WEIGHTS)
+        stmt = (
+            stmt.join(events_fts, events_fts.c.rowid == Event.id)
+            .where(literal_column("events_fts").op("MATCH")(match))
+            .order_by(rank, Event.id)
+        )
+    elif dialect == "postgresql":
+        query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        vector = literal_column("events.search_vector")
+        stmt = (
+            stmt.where(vector.op("@@")(query))
+            .order_by(func.ts_rank(vector, query).desc(), Event.id)
+        )
+    else:
+        for term in terms:
+            pattern = f"%{term}%"
+            stmt = stmt.where(or_(Event.title.ilike(pattern),
+                                  Event.description.ilike(pattern),
+                                  Event.location.ilike(pattern)))
+        stmt = stmt.order_by(Event.event_date, Event.id)
+
+    return stmt.limit(limit).offset(offset)
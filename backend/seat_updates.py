@@ -0,0 +1,183 @@
+"""Live seat availability over server-sent events.
+
+Each worker runs one background poller while it has subscribers. Up to
+SEAT_UPDATES_PER_SECOND times a second it reads the events whose
+updated_at moved (one indexed query, whatever the number of subscribers)
+and sends the new counts to the subscribers of those events. Every seat
+change bumps updated_at, whether it comes from a registration, a
+cancellation, a waitlist promotion or an edit, and on whichever worker
+it happens. So the stream needs no cross-worker messaging.
+
+A burst of changes between two polls reaches clients as one message
+carrying the latest counts. A slow client never builds up a backlog: its
+pending counts are merged until it reads them. An idle subscriber costs
+one small object and a waiting task.
+
+Messages are "event: seats" with data {"<event id>": [available, total]}.
+"""
+import asyncio
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from database import AsyncSessionLocal
+from logging_config import logger
+from metrics import SEAT_SUBSCRIBERS
+from models import Event
+
+SEAT_UPDATES_PER_SECOND = float(os.getenv("SEAT_UPDATES_PER_SECOND", 2))
+SEAT_STREAM_KEEPALIVE = float(os.getenv("SEAT_STREAM_KEEPALIVE", 15))
+SEAT_STREAM_MAX_IDS = int(os.getenv("SEAT_STREAM_MAX_IDS", 200))
+
+# Re-read changes this far back: a transaction stamps updated_at before
+# it commits, so a row can become visible after a poll that covered it
+LOOKBACK = timedelta(seconds=5)
+
+
+class Subscriber:
+    __slots__ = ("event_ids", "pending", "wakeup", "snapshot")
+
+    def __init__(self, event_ids, snapshot=None):
+        self.event_ids = event_ids  # None means every event
+        self.pending = {}
+        self.wakeup = asyncio.Event()
+        self.snapshot = snapshot
+
+    def push(self, changes):
+        if self.snapshot:
+            # The first poll re-reads recent changes the snapshot already has
+            changes = {k: v for k, v in changes.items() if self.snapshot.get(k) != v}
+            self.snapshot = None
+            if not changes:
+                return
+        self.pending.update(changes)
+        self.wakeup.set()
+
+    def take(self):
+        changes, self.pending = self.pending, {}
+        self.wakeup.clear()
+        return changes
+
+
+class SeatBroadcaster:
+    """Polls seat changes and fans them out to this worker's subscribers"""
+
+    def __init__(self, updates_per_second=SEAT_UPDATES_PER_SECOND):
+        self.interval = 1 / updates_per_second
+        self._by_event = defaultdict(set)
+        self._all = set()
+        self._count = 0
+        self._task = None
+        self._since = None
+        self._last = {}  # event id -> ((available, total), updated_at)
+
+    def subscribe(self, event_ids=None, snapshot=None):
+        """Register a subscriber; snapshot holds the counts it was sent"""
+        subscriber = Subscriber(event_ids, snapshot)
+        if event_ids is None:
+            self._all.add(subscriber)
+        else:
+            for event_id in event_ids:
+                self._by_event[event_id].add(subscriber)
+        self._count += 1
+        SEAT_SUBSCRIBERS.inc()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        if subscriber.event_ids is None:
+            self._all.discard(subscriber)
+        else:
+            for event_id in subscriber.event_ids:
+                subscribers = self._by_event.get(event_id)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._by_event[event_id]
+        self._count -= 1
+        SEAT_SUBSCRIBERS.dec()
+
+    def __len__(self):
+        return self._count
+
+    async def _run(self):
+        self._since = datetime.utcnow()
+        self._last.clear()
+        try:
+            while self._count:
+                await asyncio.sleep(self.interval)
+                try:
+                    await self._poll()
+                except Exception:
+                    logger.exception("Seat update poll failed")
+        finally:
+            self._task = None
+
+    async def _poll(self):
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(Event.id, Event.available_seats, Event.total_seats,
+                       Event.updated_at)
+                .where(Event.updated_at >= self._since - LOOKBACK)
+            )).all()
+        self._since = now
+
+        changes = {}
+        for event_id, available, total, updated_at in rows:
+            value = (available, total)
+            last = self._last.get(event_id)
+            if last is None or last[0] != value:
+                changes[event_id] = value
+            self._last[event_id] = (value, updated_at)
+
+        # Rows older than the window will not be read again
+        horizon = now - 2 * LOOKBACK
+        for event_id in [k for k, (_, t) in self._last.items() if t and t < horizon]:
+            del self._last[event_id]
+
+        if changes:
+            self.publish(changes)
+
+    def publish(self, changes):
+        """Queue {event_id: (available, total)} for interested subscribers"""
+        targets = defaultdict(dict)
+        for event_id, value in changes.items():
+            for subscriber in self._by_event.get(event_id, ()):
+                targets[subscriber][event_id] = value
+        for subscriber, subset in targets.items():
+            subscriber.push(subset)
+        for subscriber in self._all:
+            subscriber.push(changes)
+
+
+seat_broadcaster = SeatBroadcaster()
+
+
+def format_seats(changes):
+    data = json.dumps({str(k): list(v) for k, v in changes.items()},
+                      separators=(",", ":"))
+    return f"event: seats\ndata: {data}\n\n"
+
+
+async def seat_stream(subscriber, snapshot, is_disconnected):
+    """SSE body for one subscriber; unsubscribes when the client goes away"""
+    try:
+        yield "retry: 3000\n\n"
+        if snapshot:
+            yield format_seats(snapshot)
+        while True:
+            try:
+                await asyncio.wait_for(subscriber.wakeup.wait(), SEAT_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            yield format_seats(subscriber.take())
+    finally:
+        seat_broadcaster.unsubscribe(subscriber)
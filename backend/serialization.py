@@ -0,0 +1,122 @@
+"""Fast JSON for the list endpoints.
+
+Returning ORM objects through response_model costs three passes per
+row: SQLAlchemy builds the objects (and tracks them in the session),
+pydantic validates them from their attributes, and the result is
+encoded. For long lists that costs more than the query.
+
+A RowShape selects just the columns of a response schema as plain rows
+and encodes them with orjson. Keys and column order come from the
+schema at import time. The output is what pydantic's model_dump_json
+gives for the schema: fields in declaration order, the same datetime
+format, nested objects as null when the outer join found nothing.
+
+stream_json_array writes very long lists as a chunked JSON array. Rows
+are fetched and encoded a batch at a time, so memory stays flat however
+many rows there are.
+
+dashboard_json assembles the dashboard (profile, counts and both lists)
+from the rows of the same shapes.
+"""
+import os
+
+import orjson
+from sqlalchemy import select, null
+
+from database import AsyncSessionLocal
+from models import User, Event, Registration
+from schemas import UserResponse, EventResponse, RegistrationResponse, \
+    RegistrationWithEventResponse
+
+# Rows fetched and encoded per chunk of a streamed array
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", 1000))
+
+
+class RowShape:
+    """Columns of a response schema and the JSON objects built from them.
+
+    nested maps a field to (RowShape, onclause, outer) for a joined
+    object. Its columns follow the parent's, and its first field must be
+    its primary key, which is NULL when an outer join found nothing.
+    """
+
+    def __init__(self, schema, entity, **nested):
+        self.entity = entity
+        self.keys = tuple(schema.model_fields)
+        self.columns = []
+        for name in self.keys:
+            # A nested field gets a placeholder that build() overwrites,
+            # which keeps it in its place in the key order
+            self.columns.append(null() if name in nested else getattr(entity, name))
+        self._nested = []
+        self._joins = []
+        for name, (shape, onclause, outer) in nested.items():
+            self._nested.append((name, shape, len(self.columns)))
+            self.columns.extend(shape.columns)
+            self._joins.append((shape.entity, onclause, outer))
+            self._joins.extend(shape._joins)
+
+    def select(self):
+        """SELECT of the shape's columns with its joins; add filters and order"""
+        stmt = select(*self.columns).select_from(self.entity)
+        for entity, onclause, outer in self._joins:
+            stmt = stmt.join(entity, onclause, isouter=outer)
+        return stmt
+
+    def build(self, row):
+        """The JSON object (dict) of one row"""
+        obj = dict(zip(self.keys, row))
+        for name, shape, start in self._nested:
+            obj[name] = shape.build(row[start:]) if row[start] is not None else None
+        return obj
+
+    def objects(self, rows):
+        """JSON objects (dicts) of rows"""
+        return [self.build(row) for row in rows]
+
+    def dumps(self, rows):
+        """JSON array of rows"""
+        return orjson.dumps(self.objects(rows))
+
+
+USER_ROWS = RowShape(UserResponse, User)
+EVENT_ROWS = RowShape(
+    EventResponse, Event,
+    organizer=(USER_ROWS, Event.organizer_id == User.id, True))
+REGISTRATION_ROWS = RowShape(RegistrationResponse, Registration)
+REGISTRATION_WITH_EVENT_ROWS = RowShape(
+    RegistrationWithEventResponse, Registration,
+    event=(EVENT_ROWS, Registration.event_id == Event.id, False))
+
+
+def dashboard_json(profile, registrations, events):
+    """JSON of DashboardResponse.
+
+    profile is a USER_ROWS row followed by the user's registrations_count
+    and events_count (async_crud.get_dashboard_profile).
+    """
+    user = USER_ROWS.build(profile)
+    registrations_count, events_count = profile[len(USER_ROWS.columns):][:2]
+    return orjson.dumps({
+        "profile": user,
+        "stats": {"user_id": user["id"], "registrations": registrations_count or 0,
+                  "events": events_count or 0},
+        "registrations": REGISTRATION_WITH_EVENT_ROWS.objects(registrations),
+        "events": EVENT_ROWS.objects(events),
+    })
+
+
+async def stream_json_array(shape, stmt):
+    """Body of a StreamingResponse with the rows of stmt as a JSON array.
+
+    Uses its own session: the request's session is closed before a
+    streamed body is sent.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+        yield b"["
+        first = True
+        async for rows in result.partitions(STREAM_CHUNK_ROWS):
+            yield (b"" if first else b",") + shape.dumps(rows)[1:-1]
+            first = False
+        yield b"]"
@@ -0,0 +1,128 @@
+"""Signed session tokens.
+
+A token is "<payload>.<signature>": base64url JSON {"sub", "exp", "ver"}
+signed with HMAC-SHA256 over SESSION_SECRET. Any worker that shares the
+secret can check a token without a database query, so requests need no
+sticky sessions.
+
+"ver" is the user's token_version at login. Logging out bumps that
+version, which revokes every token issued before. Each worker keeps the
+current versions in a small LRU with a TTL, so revocation is immediate
+on the worker that handled the logout and takes at most
+SESSION_CACHE_TTL seconds on the others. Only a cache miss costs a query.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import MemoryCache
+from database import get_async_db
+from logging_config import logger
+from models import User
+
+SESSION_SECRET = os.getenv("SESSION_SECRET")
+SESSION_TTL = int(os.getenv("SESSION_TTL", 24 * 3600))
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", 30))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 10000))
+
+if not SESSION_SECRET:
+    # Fine for one process; every worker must share the secret otherwise
+    SESSION_SECRET = secrets.token_urlsafe(32)
+    logger.warning("SESSION_SECRET is not set, tokens are valid in this process only")
+
+_key = SESSION_SECRET.encode()
+
+# user id -> current token_version
+session_cache = MemoryCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL,
+                            name="sessions")
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    return _b64encode(hmac.new(_key, payload.encode(), hashlib.sha256).digest())
+
+
+def issue_token(user_id: int, token_version: Optional[int] = 0):
+    """Signed token for user, valid for SESSION_TTL seconds"""
+    claims = {"sub": user_id, "exp": int(time.time()) + SESSION_TTL,
+              "ver": token_version or 0}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_token(token: str):
+    """Claims of a valid, unexpired token; raises ValueError otherwise"""
+    try:
+        payload, signature = token.split(".")
+        if not hmac.compare_digest(signature, _sign(payload)):
+            raise ValueError("bad signature")
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError("malformed token") from e
+    if claims.get("exp", 0) < time.time():
+        raise ValueError("token expired")
+    return claims
+
+
+def _session_key(user_id):
+    return f"user:{user_id}"
+
+
+def forget_session(user_id: int):
+    """Drop the cached token_version of a user (logout, user deleted)"""
+    session_cache.invalidate(_session_key(user_id))
+
+
+async def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(_bearer),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Id of the user the bearer token belongs to; 401 if missing or revoked"""
+    unauthorized = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+    if credentials is None:
+        raise unauthorized
+    try:
+        claims = decode_token(credentials.credentials)
+    except ValueError:
+        raise unauthorized
+
+    user_id = claims["sub"]
+    key = _session_key(user_id)
+    version = session_cache.get(key)
+    if version is None:
+        generation = session_cache.generation()
+        row = (await db.execute(
+            select(User.token_version).where(User.id == user_id))).first()
+        if row is None:
+            raise unauthorized
+        version = row.token_version or 0
+        session_cache.set(key, version, generation)
+
+    if claims["ver"] != version:
+        raise unauthorized
+    return user_id
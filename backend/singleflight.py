@@ -0,0 +1,66 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+When a popular event is announced, many clients miss the event cache at
+the same moment and each would run the same query and serialization.
+SingleFlight lets the first of them (the leader) run the fetch, and the
+other requests for the same key await the leader's result instead of
+starting their own.
+
+Correctness with writes comes from the key: callers include the event
+cache generation, which every event change (seat reservations and
+cancellations included) bumps before it returns. A request that arrives
+after a write sees the new generation and starts a new flight instead of
+joining one that may have read the old row.
+
+COALESCE_WINDOW_MS bounds how old a shared read may be: a request joins
+a flight only if it started less than that long ago, otherwise it starts
+a new one. 0 turns coalescing off. Flights are per process; the fetch
+runs in its own task, so a leader whose client disconnects does not
+cancel it for the others.
+"""
+import asyncio
+import os
+import time
+
+from metrics import metrics
+
+COALESCE_WINDOW = float(os.getenv("COALESCE_WINDOW_MS", 100)) / 1000
+
+
+class SingleFlight:
+    """Shares one in-flight call per key between concurrent callers"""
+
+    def __init__(self, name, window=COALESCE_WINDOW):
+        self.name = name
+        self.window = window
+        # key -> (task, started_at)
+        self._flights = {}
+
+    async def do(self, key, fetch):
+        """Result of fetch() (a coroutine function), shared with the calls
+        for the same key that arrive while it runs"""
+        if self.window <= 0:
+            return await fetch()
+        now = time.monotonic()
+        flight = self._flights.get(key)
+        if flight is not None and now - flight[1] < self.window:
+            metrics.record_coalesced(self.name)
+        else:
+            flight = (asyncio.ensure_future(fetch()), now)
+            self._flights[key] = flight
+            flight[0].add_done_callback(lambda task: self._finish(key, flight))
+        return await asyncio.shield(flight[0])
+
+    def _finish(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        task = flight[0]
+        if not task.cancelled():
+            # Mark the exception retrieved in case every caller went away
+            task.exception()
+
+    def __len__(self):
+        return len(self._flights)
+
+
+event_flights = SingleFlight("events")
@@ -0,0 +1,152 @@
+"""Opt-in per-request SQL profiling (SQL_PROFILING=true).
+
+Engine event hooks count the statements each request runs and the time
+spent in the database. The middleware in main.py adds both to the
+request log line and to a Server-Timing header, which browser dev tools
+show next to the request. A request that runs more than
+SQL_QUERY_WARN statements is logged as a warning, because that is how
+N+1 query patterns look from the outside.
+
+Statements slower than SLOW_QUERY_MS go to logs/slow_queries.log with
+their normalized text (literals and placeholders replaced by "?") and,
+for SELECTs on SQLite and Postgres, the EXPLAIN plan. Parameter values
+are never logged.
+
+EXPLAIN runs on the request's own connection, inside its transaction. On
+Postgres any failed statement aborts that transaction, so EXPLAIN runs in
+a savepoint there and a failure is rolled back to it.
+"""
+import logging
+import os
+import re
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from logging_config import logger
+
+SQL_PROFILING = os.getenv("SQL_PROFILING", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+SQL_QUERY_WARN = int(os.getenv("SQL_QUERY_WARN", 20))
+
+slow_query_logger = logging.getLogger("innoevent.slow_queries")
+
+# Stats of the current request, set by the middleware
+query_stats_var = ContextVar("query_stats", default=None)
+
+_EXPLAIN = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+_EXPLAIN_SAVEPOINT = "sql_profiling_explain"
+
+
+class QueryStats:
+    __slots__ = ("count", "time_ms")
+
+    def __init__(self):
+        self.count = 0
+        self.time_ms = 0.0
+
+
+def start_request():
+    """Fresh stats for the current request"""
+    stats = QueryStats()
+    query_stats_var.set(stats)
+    return stats
+
+
+def server_timing(stats, total_ms):
+    """Server-Timing header value for a finished request"""
+    return (f'db;dur={stats.time_ms:.2f};desc="queries: {stats.count}", '
+            f"total;dur={total_ms:.2f}")
+
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(
+    r"'(?:[^']|'')*'"             # string literals
+    r"|%\(\w+\)s|%s"              # pyformat / format placeholders
+    r"|(?<![\w.:]):\w+"           # named placeholders
+    r"|\$\d+"                     # numeric placeholders
+    r"|(?<![\w.])\d+(?:\.\d+)?"   # numbers
+)
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize_statement(statement: str):
+    """Statement text with literals and placeholders replaced by "?",
+    so that runs of the same query group together"""
+    text = _LITERALS.sub("?", _WHITESPACE.sub(" ", statement).strip())
+    return _LISTS.sub("(?, ...)", text)
+
+
+def _explain(conn, statement, parameters):
+    prefix = _EXPLAIN.get(conn.dialect.name)
+    # Only reads: a plan is all we want, never a second chance for a write
+    if prefix is None or not statement.lstrip().lower().startswith("select"):
+        return None
+    savepoint = (conn.dialect.name == "postgresql"
+                 and conn.get_execution_options().get("isolation_level") != "AUTOCOMMIT")
+    # Raw DBAPI cursor: running it through the Connection would fire these
+    # hooks again and could disturb the statement being profiled
+    cursor = conn.connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+        except Exception as e:
+            if savepoint:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            plan = [f"EXPLAIN failed: {e}"]
+        if savepoint:
+            cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        return plan
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.count += 1
+        stats.time_ms += elapsed_ms
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        plan = None
+        if SLOW_QUERY_EXPLAIN and not executemany:
+            plan = _explain(conn, statement, parameters)
+        slow_query_logger.warning(
+            "Slow query (%.1fms)", elapsed_ms,
+            extra={"fields": {
+                "duration_ms": round(elapsed_ms, 2),
+                "statement": normalize_statement(statement),
+                "plan": plan,
+            }})
+
+
+def _handle_error(exception_context):
+    # The statement failed, so after_cursor_execute will not pop its start
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument(*engines):
+    """Attach the profiling hooks to sync engines (use .sync_engine for
+    async ones)"""
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    logger.info("SQL profiling enabled, slow query threshold %sms", SLOW_QUERY_MS)
@@ -0,0 +1,56 @@
+"""Serving the built frontend from the API process.
+
+Set FRONTEND_DIST to the frontend's dist directory (built by
+frontend/build_assets.py) and main.py mounts it at "/", behind every
+API route. One uvicorn process then serves both the API and the
+frontend.
+
+On top of StaticFiles (ETag, Last-Modified, Range), FrontendFiles
+- sends the precompressed .br / .gz variant of a file when the client
+  accepts it, so nothing is compressed per request,
+- marks fingerprinted files (style.3f2a9c1b0d.css) immutable and
+  everything else, index.html included, no-cache.
+"""
+import mimetypes
+import os
+import re
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+
+from compression import choose_encoding
+
+FRONTEND_DIST = os.getenv("FRONTEND_DIST")
+
+# Names written by frontend/build_assets.py
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{10}\.\w+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+PRECOMPRESSED = {"br": ".br", "gzip": ".gz"}
+
+
+class FrontendFiles(StaticFiles):
+    """StaticFiles with precompressed variants and fingerprint caching"""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        full_path = os.fsdecode(full_path)
+        request_headers = Headers(scope=scope)
+        headers = {
+            "Cache-Control": IMMUTABLE if FINGERPRINTED.search(full_path) else "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        path = full_path
+        available = [encoding for encoding, suffix in PRECOMPRESSED.items()
+                     if os.path.isfile(full_path + suffix)]
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""), available)
+        if encoding:
+            path = full_path + PRECOMPRESSED[encoding]
+            stat_result = os.stat(path)
+            headers["Content-Encoding"] = encoding
+
+        response = FileResponse(
+            path, status_code=status_code, stat_result=stat_result, headers=headers,
+            media_type=mimetypes.guess_type(full_path)[0] or "application/octet-stream")
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,69 @@
+"""Test setup: a scratch SQLite database and an in-process client.
+
+Run from the backend directory:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = tempfile.mkdtemp()
+
+# Set before the app modules read them at import time
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP_DIR}/test.db"
+os.environ.setdefault("SESSION_SECRET", "test-secret")
+sys.path.insert(0, BACKEND_DIR)
+# logs/ is created in the working directory
+os.chdir(TMP_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from logging_config import listener  # noqa: E402
+
+PASSWORD = "secret123"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def log_writer():
+    """Write out the queued log records while pytest still captures output"""
+    yield
+    listener.stop()
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(client):
+    """Sign up a new user; returns (user id, auth headers)"""
+    def make_user():
+        email = f"{uuid.uuid4().hex[:12]}@innopolis.university"
+        response = client.post("/api/users", json={
+            "surname": "Test", "name": "User", "email": email, "password": PASSWORD})
+        assert response.status_code == 201, response.text
+        login = client.post("/api/auth/login", data={"email": email, "password": PASSWORD})
+        assert login.status_code == 200, login.text
+        return response.json()["id"], {"Authorization": f"Bearer {login.json()['access_token']}"}
+    return make_user
+
+
+@pytest.fixture
+def make_event(client):
+    """Create an event organized by the user of headers; returns its id"""
+    def make_event(headers, total_seats=10):
+        response = client.post("/api/events", headers=headers, json={
+            "title": "Test event", "description": "d", "event_type": "meetup",
+            "event_date": "2030-01-01T10:00:00", "location": "Room 101",
+            "total_seats": total_seats})
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+    return make_event
@@ -0,0 +1,18 @@
+from aggregates import check_aggregates
+from database import engine
+
+
+def _register(client, headers, event_id):
+    response = client.post("/api/registrations", headers=headers, json={"event_id": event_id})
+    assert response.status_code == 201, response.text
+
+
+def test_delete_event_keeps_type_totals(client, make_user, make_event):
+    _, organizer = make_user()
+    event_id = make_event(organizer)
+    for _ in range(3):
+        _register(client, make_user()[1], event_id)
+
+    assert client.delete(f"/api/events/{event_id}", headers=organizer).status_code == 204
+    assert check_aggregates(engine) == {
+        "event_seats": 0, "user_registrations": 0, "user_events": 0, "event_types": 0}
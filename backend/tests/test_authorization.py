@@ -0,0 +1,157 @@
+def test_update_user_requires_token(client, make_user):
+    user_id, _ = make_user()
+    assert client.put(f"/api/users/{user_id}", json={"name": "X"}).status_code == 401
+
+
+def test_update_user_rejects_other_user(client, make_user):
+    user_id, _ = make_user()
+    _, other = make_user()
+    response = client.put(f"/api/users/{user_id}", json={"name": "X"}, headers=other)
+    assert response.status_code == 403
+
+
+def test_update_user_as_owner(client, make_user):
+    user_id, headers = make_user()
+    response = client.put(f"/api/users/{user_id}", json={"name": "X"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["name"] == "X"
+
+
+def test_delete_user_requires_token(client, make_user):
+    user_id, _ = make_user()
+    assert client.delete(f"/api/users/{user_id}").status_code == 401
+
+
+def test_delete_user_rejects_other_user(client, make_user):
+    user_id, _ = make_user()
+    _, other = make_user()
+    assert client.delete(f"/api/users/{user_id}", headers=other).status_code == 403
+    assert client.get(f"/api/users/{user_id}").status_code == 200
+
+
+def test_bulk_register_requires_token(client, make_user, make_event):
+    _, organizer = make_user()
+    event_id = make_event(organizer)
+    response = client.post("/api/registrations/bulk", json={"event_id": event_id, "user_ids": [1]})
+    assert response.status_code == 401
+
+
+def test_bulk_register_rejects_non_organizer(client, make_user, make_event):
+    _, organizer = make_user()
+    user_id, user = make_user()
+    event_id = make_event(organizer)
+    response = client.post("/api/registrations/bulk", headers=user,
+                           json={"event_id": event_id, "user_ids": [user_id]})
+    assert response.status_code == 403
+
+
+def test_bulk_register_as_organizer(client, make_user, make_event):
+    _, organizer = make_user()
+    user_id, _ = make_user()
+    event_id = make_event(organizer)
+    response = client.post("/api/registrations/bulk", headers=organizer,
+                           json={"event_id": event_id, "user_ids": [user_id]})
+    assert response.status_code == 200
+    assert response.json()["registered"] == 1
+
+
+def _register(client, headers, event_id):
+    response = client.post("/api/registrations", headers=headers, json={"event_id": event_id})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_cancel_registration_requires_token(client, make_user, make_event):
+    _, organizer = make_user()
+    _, user = make_user()
+    registration_id = _register(client, user, make_event(organizer))
+    assert client.delete(f"/api/registrations/{registration_id}").status_code == 401
+
+
+def test_cancel_registration_rejects_other_user(client, make_user, make_event):
+    _, organizer = make_user()
+    _, user = make_user()
+    _, other = make_user()
+    registration_id = _register(client, user, make_event(organizer))
+    response = client.delete(f"/api/registrations/{registration_id}", headers=other)
+    assert response.status_code == 403
+
+
+def test_cancel_registration_by_user_or_organizer(client, make_user, make_event):
+    _, organizer = make_user()
+    _, user = make_user()
+    event_id = make_event(organizer)
+    registration_id = _register(client, user, event_id)
+    assert client.delete(f"/api/registrations/{registration_id}", headers=user).status_code == 204
+    registration_id = _register(client, user, event_id)
+    response = client.delete(f"/api/registrations/{registration_id}", headers=organizer)
+    assert response.status_code == 204
+
+
+def test_update_event_requires_token(client, make_user, make_event):
+    _, organizer = make_user()
+    event_id = make_event(organizer)
+    assert client.put(f"/api/events/{event_id}", json={"title": "X"}).status_code == 401
+
+
+def test_update_event_rejects_non_organizer(client, make_user, make_event):
+    _, organizer = make_user()
+    _, other = make_user()
+    event_id = make_event(organizer)
+    response = client.put(f"/api/events/{event_id}", json={"title": "X"}, headers=other)
+    assert response.status_code == 403
+    assert client.get(f"/api/events/{event_id}").json()["title"] == "Test event"
+
+
+def test_update_missing_event(client, make_user):
+    _, headers = make_user()
+    assert client.put("/api/events/999999", json={"title": "X"}, headers=headers).status_code == 404
+
+
+def test_delete_event_requires_token(client, make_user, make_event):
+    _, organizer = make_user()
+    assert client.delete(f"/api/events/{make_event(organizer)}").status_code == 401
+
+
+def test_delete_event_rejects_non_organizer(client, make_user, make_event):
+    _, organizer = make_user()
+    _, other = make_user()
+    event_id = make_event(organizer)
+    assert client.delete(f"/api/events/{event_id}", headers=other).status_code == 403
+    assert client.get(f"/api/events/{event_id}").status_code == 200
+
+
+def test_delete_event_as_organizer(client, make_user, make_event):
+    _, organizer = make_user()
+    event_id = make_event(organizer)
+    assert client.delete(f"/api/events/{event_id}", headers=organizer).status_code == 204
+    assert client.get(f"/api/events/{event_id}").status_code == 404
+
+
+def _join_waitlist(client, make_user, make_event):
+    """A full event and a waitlist entry on it; returns (organizer, user, entry id)"""
+    _, organizer = make_user()
+    event_id = make_event(organizer, total_seats=1)
+    _register(client, make_user()[1], event_id)
+    _, user = make_user()
+    response = client.post("/api/registrations", headers=user, json={"event_id": event_id})
+    assert response.status_code == 202, response.text
+    return organizer, user, response.json()["id"]
+
+
+def test_leave_waitlist_requires_token(client, make_user, make_event):
+    _, _, entry_id = _join_waitlist(client, make_user, make_event)
+    assert client.delete(f"/api/waitlist/{entry_id}").status_code == 401
+
+
+def test_leave_waitlist_rejects_other_user(client, make_user, make_event):
+    _, _, entry_id = _join_waitlist(client, make_user, make_event)
+    _, other = make_user()
+    assert client.delete(f"/api/waitlist/{entry_id}", headers=other).status_code == 403
+
+
+def test_leave_waitlist_by_user_or_organizer(client, make_user, make_event):
+    _, user, entry_id = _join_waitlist(client, make_user, make_event)
+    assert client.delete(f"/api/waitlist/{entry_id}", headers=user).status_code == 204
+    organizer, _, entry_id = _join_waitlist(client, make_user, make_event)
+    assert client.delete(f"/api/waitlist/{entry_id}", headers=organizer).status_code == 204
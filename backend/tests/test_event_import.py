@@ -0,0 +1,25 @@
+CSV_HEADER = "title,event_type,event_date,location,total_seats\n"
+
+
+def _import(client, headers, body):
+    return client.post("/api/events/import", content=body,
+                       headers={**headers, "Content-Type": "text/csv"})
+
+
+def test_import_utf8_csv_with_bom(client, make_user):
+    _, headers = make_user()
+    body = ("\ufeff" + CSV_HEADER + "Café night,Meetup,2030-01-01T18:00:00,Hall,20\n").encode()
+    response = _import(client, headers, body)
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
+
+
+def test_import_non_utf8_csv_is_rejected(client, make_user):
+    user_id, headers = make_user()
+    body = (CSV_HEADER
+            + "Jazz night,Concert,2030-01-01T18:00:00,Hall,20\n"
+            + "Café night,Meetup,2030-01-02T18:00:00,Hall,20\n").encode("latin-1")
+    response = _import(client, headers, body)
+    assert response.status_code == 400
+    assert "Line 3" in response.json()["detail"]
+    assert client.get(f"/api/events/user/{user_id}").json() == []
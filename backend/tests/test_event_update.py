@@ -0,0 +1,42 @@
+def _register_users(client, make_user, event_id, count):
+    for _ in range(count):
+        _, headers = make_user()
+        response = client.post("/api/registrations", headers=headers, json={"event_id": event_id})
+        assert response.status_code == 201, response.text
+
+
+def test_resize_keeps_registered_seats(client, make_user, make_event):
+    _, organizer = make_user()
+    event_id = make_event(organizer, total_seats=10)
+    _register_users(client, make_user, event_id, 2)
+
+    response = client.put(f"/api/events/{event_id}", json={"total_seats": 5, "title": "Renamed"},
+                          headers=organizer)
+    assert response.status_code == 200
+    event = response.json()
+    assert (event["total_seats"], event["available_seats"], event["title"]) == (5, 3, "Renamed")
+
+
+def test_resize_below_registrations_is_rejected(client, make_user, make_event):
+    _, organizer = make_user()
+    event_id = make_event(organizer, total_seats=10)
+    _register_users(client, make_user, event_id, 3)
+
+    response = client.put(f"/api/events/{event_id}", json={"total_seats": 2, "title": "Renamed"},
+                          headers=organizer)
+    assert response.status_code == 409
+    event = client.get(f"/api/events/{event_id}").json()
+    assert (event["total_seats"], event["available_seats"], event["title"]) == (10, 7, "Test event")
+
+
+def test_resize_promotes_waitlist(client, make_user, make_event):
+    _, organizer = make_user()
+    event_id = make_event(organizer, total_seats=1)
+    _register_users(client, make_user, event_id, 1)
+    _, waiting = make_user()
+    response = client.post("/api/registrations", headers=waiting, json={"event_id": event_id})
+    assert response.status_code == 202
+
+    event = client.put(f"/api/events/{event_id}", json={"total_seats": 3},
+                       headers=organizer).json()
+    assert (event["total_seats"], event["available_seats"]) == (3, 1)
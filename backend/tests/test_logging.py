@@ -0,0 +1,49 @@
+import io
+import logging
+import queue
+
+from logging_config import BatchingQueueListener, DeferredQueueHandler
+
+
+class FailingFlushHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.errors = 0
+
+    def emit(self, record):
+        pass
+
+    def flush(self):
+        raise OSError("No space left on device")
+
+    def handleError(self, record):
+        self.errors += 1
+
+
+def _record(message):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+
+
+def test_listener_survives_failing_flush():
+    log_queue = queue.Queue()
+    failing = FailingFlushHandler()
+    stream = io.StringIO()
+    healthy = logging.StreamHandler(stream)
+    listener = BatchingQueueListener(log_queue, failing, healthy, flush_interval=0.01)
+    listener.start()
+    log_queue.put(_record("first"))
+    log_queue.join()
+    log_queue.put(_record("second"))
+    listener.stop()
+    listener.stop()
+
+    assert failing.errors >= 1
+    assert stream.getvalue().splitlines() == ["first", "second"]
+
+
+def test_full_queue_drops_records():
+    handler = DeferredQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record("kept"))
+    handler.handle(_record("dropped"))
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().msg == "kept"
@@ -0,0 +1,18 @@
+import async_crud
+from metrics import metrics
+from passwords import PasswordPoolBusy
+
+
+def test_pool_busy_counts_one_error(client, monkeypatch):
+    async def busy(db, user):
+        raise PasswordPoolBusy()
+
+    monkeypatch.setattr(async_crud, "create_user", busy)
+    before = metrics.get_metrics()
+    response = client.post("/api/users", json={
+        "surname": "Busy", "name": "User", "password": "secret123"})
+    after = metrics.get_metrics()
+
+    assert response.status_code == 503
+    assert after["total_errors"] - before["total_errors"] == 1
+    assert after["errors_by_type"]["503"] - before["errors_by_type"].get("503", 0) == 1
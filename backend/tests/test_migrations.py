@@ -0,0 +1,41 @@
+from sqlalchemy import create_engine, inspect, text
+
+from conftest import TMP_DIR
+from migrations import MIGRATIONS, migrate, pending_migrations
+
+# Tables as created before schema migrations and the listing work existed
+BASELINE_SCHEMA = (
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY, surname VARCHAR(100) NOT NULL,
+        name VARCHAR(100) NOT NULL, phone VARCHAR(20), email VARCHAR(100) UNIQUE,
+        password VARCHAR(255) NOT NULL, created_at DATETIME)""",
+    """CREATE TABLE events (
+        id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, description TEXT,
+        event_type VARCHAR(50) NOT NULL, event_date DATETIME NOT NULL,
+        location VARCHAR(200), total_seats INTEGER NOT NULL,
+        available_seats INTEGER NOT NULL, organizer_id INTEGER REFERENCES users (id),
+        created_at DATETIME)""",
+    """CREATE TABLE registrations (
+        id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users (id),
+        event_id INTEGER REFERENCES events (id), registered_at DATETIME)""",
+)
+
+
+def test_upgrade_baseline_schema_creates_declared_indexes():
+    engine = create_engine(f"sqlite:///{TMP_DIR}/baseline.db")
+    with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            conn.execute(text(statement))
+
+    assert migrate(engine) == [version for version, _, _ in MIGRATIONS]
+    assert pending_migrations(engine) == []
+
+    inspector = inspect(engine)
+    event_indexes = {index["name"] for index in inspector.get_indexes("events")}
+    assert {
+        "ix_events_date_id", "ix_events_type_date_id", "ix_events_location_date_id",
+        "ix_events_seats_date_id", "ix_events_updated_at", "ix_events_organizer_date",
+    } <= event_indexes
+    registration_indexes = {index["name"] for index in inspector.get_indexes("registrations")}
+    assert {"uq_registrations_user_event", "ix_registrations_event_id"} <= registration_indexes
+    engine.dispose()
@@ -0,0 +1,146 @@
+"""The listing endpoints run a fixed number of SQL statements, however
+many rows they return (no N+1 queries)."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import async_crud
+import crud
+from database import engine, async_engine, SessionLocal, AsyncSessionLocal
+from models import User, Event, Registration
+from schemas import EventResponse, RegistrationResponse, RegistrationWithEventResponse
+from serialization import (
+    EVENT_ROWS, REGISTRATION_ROWS, REGISTRATION_WITH_EVENT_ROWS,
+    stream_json_array, dashboard_json
+)
+
+SIZES = (1, 20, 100)
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def seed(n):
+    """An attendee registered for n events with distinct organizers, a host
+    organizing n events and a popular event with n registrations"""
+    db = SessionLocal()
+    attendee = User(surname="Attendee", name=f"N{n}", password="x")
+    host = User(surname="Host", name=f"N{n}", password="x")
+    popular = Event(title="Popular", event_type="concert", event_date=datetime.utcnow(),
+                    location="Arena", total_seats=n, available_seats=0, organizer=host)
+    db.add_all([attendee, host, popular])
+    for i in range(n):
+        organizer = User(surname=f"Org{n}-{i}", name="Org", password="x")
+        db.add(Registration(user=attendee, event=Event(
+            title=f"Event {i}", event_type="meetup",
+            event_date=datetime.utcnow() + timedelta(days=i), location="Hall",
+            total_seats=10, available_seats=9, organizer=organizer)))
+        db.add(Registration(user=organizer, event=popular))
+        db.add(Event(title=f"Hosted {i}", event_type="meetup", event_date=datetime.utcnow(),
+                     location="Hall", total_seats=10, available_seats=10, organizer=host))
+    db.commit()
+    ids = {"attendee": attendee.id, "host": host.id, "event": popular.id}
+    db.close()
+    return ids
+
+
+@pytest.fixture(scope="module")
+def seeded(client):
+    return {n: seed(n) for n in SIZES}
+
+
+# Sync crud path, serialized through the response schemas
+
+def sync_user_registrations(db, ids):
+    return [RegistrationWithEventResponse.model_validate(r)
+            for r in crud.get_user_registrations(db, ids["attendee"])]
+
+
+def sync_event_registrations(db, ids):
+    return [RegistrationResponse.model_validate(r)
+            for r in crud.get_event_registrations(db, ids["event"])]
+
+
+def sync_user_events(db, ids):
+    return [EventResponse.model_validate(e) for e in crud.get_user_events(db, ids["host"])]
+
+
+@pytest.mark.parametrize("fetch, expected", [
+    (sync_user_registrations, 1),
+    (sync_event_registrations, 1),
+    (sync_user_events, 1),
+])
+def test_sync_query_count(seeded, fetch, expected):
+    counts = []
+    for n in SIZES:
+        with SessionLocal() as db, QueryCounter(engine) as counter:
+            assert len(fetch(db, seeded[n])) >= n
+        counts.append(counter.count)
+    assert counts == [expected] * len(SIZES)
+
+
+# Async path, the way the endpoints run it
+
+async def async_user_registrations(db, ids):
+    await async_crud.get_user_registrations_version(db, ids["attendee"])
+    rows = await async_crud.get_user_registrations(db, ids["attendee"])
+    return REGISTRATION_WITH_EVENT_ROWS.dumps(rows)
+
+
+async def async_event_registrations(db, ids):
+    stmt = async_crud.event_registrations_statement(ids["event"])
+    return b"".join([chunk async for chunk in stream_json_array(REGISTRATION_ROWS, stmt)])
+
+
+async def async_user_events(db, ids):
+    await async_crud.get_user_events_version(db, ids["host"])
+    rows = await async_crud.get_user_events(db, ids["host"])
+    return EVENT_ROWS.dumps(rows)
+
+
+async def async_dashboard(db, ids):
+    user_id = ids["attendee"]
+    profile = await async_crud.get_dashboard_profile(db, user_id)
+    await async_crud.get_user_registrations_version(db, user_id)
+    await async_crud.get_user_events_version(db, user_id)
+    registrations = await async_crud.get_user_registrations(db, user_id)
+    events = await async_crud.get_user_events(db, user_id)
+    return dashboard_json(profile, registrations, events)
+
+
+async def _measure(fetch, ids):
+    async with AsyncSessionLocal() as db:
+        with QueryCounter(async_engine.sync_engine) as counter:
+            await fetch(db, ids)
+    return counter.count
+
+
+@pytest.mark.parametrize("fetch, expected", [
+    (async_user_registrations, 2),
+    (async_event_registrations, 1),
+    (async_user_events, 2),
+    (async_dashboard, 5),
+])
+def test_async_query_count(seeded, fetch, expected):
+    async def measure_all():
+        counts = [await _measure(fetch, seeded[n]) for n in SIZES]
+        # Pooled connections belong to this event loop
+        await async_engine.dispose()
+        return counts
+
+    assert asyncio.run(measure_all()) == [expected] * len(SIZES)
@@ -2,4 +2,4 @@
 CREATE DATABASE innoevent;
 
 -- Подключаемся к БД (в docker-compose это автоматически)
--- Таблицы будут созданы автоматически FastAPI при запуске
+-- Таблицы создаются миграциями backend (migrations.py) при запуске
@@ -1,17 +1,59 @@
-from flask import Flask, render_template, send_from_directory
+from flask import Flask, request, send_from_directory
 from flask_cors import CORS
+import mimetypes
 import os
 
+from build_assets import FINGERPRINTED
+
+# Built frontend (python build_assets.py), e.g. dist. Unset: the source
+# files are served as they are, in debug mode
+FRONTEND_DIST = os.getenv('FRONTEND_DIST')
+STATIC_DIR = FRONTEND_DIST or '.'
+
+# Fingerprinted files never change under the same name
+IMMUTABLE = 'public, max-age=31536000, immutable'
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
 app = Flask(__name__)
 CORS(app)
 
+
+def send_asset(filename):
+    """Send a file of STATIC_DIR; in production with its cache headers and
+    precompressed variant (send_file handles ETag and Range)"""
+    if not FRONTEND_DIST:
+        return send_from_directory(STATIC_DIR, filename)
+
+    encoding = None
+    for candidate, suffix in PRECOMPRESSED:
+        if request.accept_encodings[candidate] and \
+                os.path.isfile(os.path.join(STATIC_DIR, filename + suffix)):
+            encoding = candidate
+            break
+    if encoding:
+        response = send_from_directory(
+            STATIC_DIR, filename + suffix,
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(STATIC_DIR, filename)
+    response.vary.add('Accept-Encoding')
+    if FINGERPRINTED.search(filename):
+        response.headers['Cache-Control'] = IMMUTABLE
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
 @app.route('/')
 def index():
-    return send_from_directory('.', 'index.html')
+    return send_asset('index.html')
+
 
 @app.route('/<path:filename>')
 def serve_static(filename):
-    return send_from_directory('.', filename)
+    return send_asset(filename)
+
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=3000)
+    app.run(debug=not FRONTEND_DIST, host='0.0.0.0', port=3000)
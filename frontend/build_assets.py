@@ -0,0 +1,92 @@
+"""Build the production copy of the frontend into dist/.
+
+- Every asset except index.html gets a hash of its content in its name
+  (style.css -> style.3f2a9c1b0d.css), and the references to it in
+  index.html and style.css are rewritten. A changed file gets a new URL,
+  so browsers may cache these files forever (Cache-Control: immutable).
+  index.html keeps its name and is revalidated on every visit.
+- Text files get precompressed .gz and .br variants (.br needs the
+  brotli package). A variant is kept only if it is smaller.
+- manifest.json maps source names to built names.
+
+Both app.py (FRONTEND_DIST=dist) and the backend (FRONTEND_DIST pointing
+here) serve dist/ with the matching cache headers. Run from the
+frontend directory after every change:
+
+    python build_assets.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+try:
+    import brotli  # optional dependency, enables .br variants
+except ImportError:
+    brotli = None
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(SOURCE_DIR, "dist")
+
+# Referenced files come before the files referencing them
+ASSETS = ("logo.png", "background.png", "style.css", "script.js")
+ENTRY = "index.html"
+TEXT_TYPES = (".html", ".css", ".js", ".svg", ".json")
+HASH_LENGTH = 10
+
+# Names like style.3f2a9c1b0d.css
+FINGERPRINTED = re.compile(r"\.[0-9a-f]{%d}\.\w+$" % HASH_LENGTH)
+
+
+def fingerprint(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def rewrite(data, manifest):
+    """Point quoted or url() references at the built names"""
+    text = data.decode("utf-8")
+    for source, built in manifest.items():
+        text = re.sub(r"(?<=[\"'(])" + re.escape(source) + r"(?=[\"')])", built, text)
+    return text.encode("utf-8")
+
+
+def precompress(path, data):
+    """Write the .gz / .br variants of path that are smaller than data"""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+def build():
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+    manifest = {}
+    for name in ASSETS + (ENTRY,):
+        with open(os.path.join(SOURCE_DIR, name), "rb") as f:
+            data = f.read()
+        if name.endswith(TEXT_TYPES):
+            data = rewrite(data, manifest)
+        built = name if name == ENTRY else fingerprint(name, data)
+        manifest[name] = built
+        path = os.path.join(DIST_DIR, built)
+        with open(path, "wb") as f:
+            f.write(data)
+        if name.endswith(TEXT_TYPES):
+            precompress(path, data)
+        print(f"{name:<16} -> {built}")
+
+    with open(os.path.join(DIST_DIR, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    if brotli is None:
+        print("brotli is not installed, no .br variants")
+
+
+if __name__ == "__main__":
+    build()
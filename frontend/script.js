@@ -3,6 +3,12 @@ const API_BASE_URL = 'http://localhost:8000/api';
 let currentUserId = null;
 let currentUserName = null;
 let isAuthenticated = false;
+let authToken = null;
+
+// Headers for requests that act as the signed-in user
+function authHeaders(headers = {}) {
+    return { ...headers, 'Authorization': `Bearer ${authToken}` };
+}
 
 // ===== PAGES =====
 
@@ -67,6 +73,7 @@ async function handleRegister() {
         const userData = await response.json();
         currentUserId = userData.id;
         currentUserName = userData.name;
+        authToken = userData.access_token;
         isAuthenticated = true;
 
         // Clear form
@@ -115,6 +122,7 @@ async function handleLogin() {
         const userData = await response.json();
         currentUserId = userData.id;
         currentUserName = userData.name;
+        authToken = userData.access_token;
         isAuthenticated = true;
 
         // Clear form
@@ -131,40 +139,132 @@ async function handleLogin() {
 
 // ===== EVENTS =====
 
-async function loadEvents(eventType = null) {
+function renderEventCards(events, eventsList) {
+    events.forEach(event => {
+        const eventCard = document.createElement('div');
+        eventCard.className = 'event-card';
+        eventCard.dataset.eventId = event.id;
+        const registerBtn = isAuthenticated
+            ? `<button class="register-btn" onclick="registerForEvent(${event.id})">${event.available_seats > 0 ? 'Register' : 'Join Waitlist'}</button>`
+            : `<button onclick="alert('Please sign in to register for an event')">Register</button>`;
+
+        eventCard.innerHTML = `
+            <h3>${event.title}</h3>
+            <p><strong>Organizer:</strong> ${event.organizer.name} ${event.organizer.surname}</p>
+            <p><strong>Type:</strong> ${event.event_type}</p>
+            <p><strong>Date:</strong> ${new Date(event.event_date).toLocaleString('en-US', { year: 'numeric', month: '2-digit', day: '2-digit', hour: '2-digit', minute: '2-digit' })}</p>
+            <p><strong>Location:</strong> ${event.location}</p>
+            <p><strong>Available Seats:</strong> <span class="seat-count">${event.available_seats}/${event.total_seats}</span></p>
+            ${registerBtn}
+        `;
+        eventsList.appendChild(eventCard);
+    });
+    subscribeSeatUpdates();
+}
+
+// ===== LIVE SEATS =====
+
+let seatStream = null;
+
+// Follow seat counts of the cards on screen; reopened whenever they change
+function subscribeSeatUpdates() {
+    if (seatStream) seatStream.close();
+    const ids = [...document.querySelectorAll('#eventsList .event-card')]
+        .map(card => card.dataset.eventId)
+        .slice(0, 200);
+    if (ids.length === 0) return;
+
+    seatStream = new EventSource(`${API_BASE_URL}/events/stream?ids=${ids.join(',')}`);
+    seatStream.addEventListener('seats', message => {
+        const seats = JSON.parse(message.data);
+        Object.entries(seats).forEach(([eventId, [available, total]]) => {
+            const card = document.querySelector(`#eventsList .event-card[data-event-id="${eventId}"]`);
+            if (!card) return;
+            card.querySelector('.seat-count').textContent = `${available}/${total}`;
+            const button = card.querySelector('.register-btn');
+            if (button) button.textContent = available > 0 ? 'Register' : 'Join Waitlist';
+        });
+    });
+}
+
+let eventSearchTimer = null;
+
+function onEventSearchInput() {
+    // Wait for a pause in typing instead of querying on every keystroke
+    clearTimeout(eventSearchTimer);
+    eventSearchTimer = setTimeout(() => {
+        const query = document.getElementById('eventSearch').value.trim();
+        if (query) {
+            searchEvents(query);
+        } else {
+            loadEvents();
+        }
+    }, 250);
+}
+
+async function searchEvents(query, offset = 0) {
     try {
-        let url = `${API_BASE_URL}/events`;
-        if (eventType) url += `?event_type=${eventType}`;
+        const params = new URLSearchParams({ q: query });
+        if (offset) params.set('offset', offset);
+        const response = await fetch(`${API_BASE_URL}/events/search?${params}`);
+        const events = await response.json();
+        const nextOffset = response.headers.get('X-Next-Offset');
+
+        const eventsList = document.getElementById('eventsList');
+        const loadMoreBtn = document.getElementById('loadMoreEvents');
+        if (loadMoreBtn) loadMoreBtn.remove();
+        if (!offset) eventsList.innerHTML = '';
+
+        if (events.length === 0 && !offset) {
+            eventsList.innerHTML = '<p>No events found</p>';
+            return;
+        }
+
+        renderEventCards(events, eventsList);
+
+        if (nextOffset) {
+            const moreBtn = document.createElement('button');
+            moreBtn.id = 'loadMoreEvents';
+            moreBtn.textContent = 'Load more';
+            moreBtn.onclick = () => searchEvents(query, Number(nextOffset));
+            eventsList.appendChild(moreBtn);
+        }
+    } catch (error) {
+        console.error('Error searching events:', error);
+    }
+}
+
+async function loadEvents(eventType = null, cursor = null) {
+    try {
+        const params = new URLSearchParams();
+        if (eventType) params.set('event_type', eventType);
+        if (cursor) params.set('cursor', cursor);
+        const query = params.toString();
+        const url = `${API_BASE_URL}/events${query ? `?${query}` : ''}`;
 
         const response = await fetch(url);
         const events = await response.json();
+        const nextCursor = response.headers.get('X-Next-Cursor');
 
         const eventsList = document.getElementById('eventsList');
-        eventsList.innerHTML = '';
+        const loadMoreBtn = document.getElementById('loadMoreEvents');
+        if (loadMoreBtn) loadMoreBtn.remove();
+        if (!cursor) eventsList.innerHTML = '';
 
-        if (events.length === 0) {
+        if (events.length === 0 && !cursor) {
             eventsList.innerHTML = '<p>No available events</p>';
             return;
         }
 
-        events.forEach(event => {
-            const eventCard = document.createElement('div');
-            eventCard.className = 'event-card';
-            const registerBtn = isAuthenticated
-                ? `<button onclick="registerForEvent(${event.id})" ${event.available_seats <= 0 ? 'disabled' : ''}>${event.available_seats > 0 ? 'Register' : 'No Seats'}</button>`
-                : `<button onclick="alert('Please sign in to register for an event')">Register</button>`;
+        renderEventCards(events, eventsList);
 
-            eventCard.innerHTML = `
-                <h3>${event.title}</h3>
-                <p><strong>Organizer:</strong> ${event.organizer.name} ${event.organizer.surname}</p>
-                <p><strong>Type:</strong> ${event.event_type}</p>
-                <p><strong>Date:</strong> ${new Date(event.event_date).toLocaleString('en-US', { year: 'numeric', month: '2-digit', day: '2-digit', hour: '2-digit', minute: '2-digit' })}</p>
-                <p><strong>Location:</strong> ${event.location}</p>
-                <p><strong>Available Seats:</strong> ${event.available_seats}/${event.total_seats}</p>
-                ${registerBtn}
-            `;
-            eventsList.appendChild(eventCard);
-        });
+        if (nextCursor) {
+            const moreBtn = document.createElement('button');
+            moreBtn.id = 'loadMoreEvents';
+            moreBtn.textContent = 'Load more';
+            moreBtn.onclick = () => loadEvents(eventType, nextCursor);
+            eventsList.appendChild(moreBtn);
+        }
     } catch (error) {
         console.error('Error loading events:', error);
     }
@@ -177,9 +277,9 @@ async function registerForEvent(eventId) {
     }
 
     try {
-        const response = await fetch(`${API_BASE_URL}/registrations?user_id=${currentUserId}`, {
+        const response = await fetch(`${API_BASE_URL}/registrations`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: authHeaders({ 'Content-Type': 'application/json' }),
             body: JSON.stringify({ event_id: eventId })
         });
 
@@ -189,6 +289,12 @@ async function registerForEvent(eventId) {
             return;
         }
 
+        if (response.status === 202) {
+            const entry = await response.json();
+            alert(`The event is full. You are #${entry.position} on the waitlist and will be registered automatically when a seat frees up.`);
+            return;
+        }
+
         alert('You have successfully registered for the event!');
 
         // ✅ ДОБАВЬ ЭТО - перезагрузи события
@@ -234,9 +340,9 @@ async function createEvent(e) {
             total_seats: totalSeats
         });
 
-        const response = await fetch(`${API_BASE_URL}/events?organizer_id=${currentUserId}`, {
+        const response = await fetch(`${API_BASE_URL}/events`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: authHeaders({ 'Content-Type': 'application/json' }),
             body: JSON.stringify({
                 title,
                 description,
@@ -277,7 +383,8 @@ async function cancelRegistration(registrationId) {
 
     try {
         const response = await fetch(`${API_BASE_URL}/registrations/${registrationId}`, {
-            method: 'DELETE'
+            method: 'DELETE',
+            headers: authHeaders()
         });
 
         if (!response.ok) {
@@ -294,14 +401,25 @@ async function cancelRegistration(registrationId) {
     }
 }
 
+// ===== DASHBOARD =====
+
+// Profile, registrations and organized events of the current user in one
+// request; the browser revalidates it with its ETag (304 when unchanged)
+async function loadDashboard() {
+    const response = await fetch(`${API_BASE_URL}/dashboard/${currentUserId}`);
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+}
+
 // ===== PROFILE =====
 
 async function loadProfile() {
     if (!currentUserId) return;
 
     try {
-        const response = await fetch(`${API_BASE_URL}/profile/${currentUserId}`);
-        const user = await response.json();
+        const { profile: user } = await loadDashboard();
 
         document.getElementById('profileSurname').value = user.surname;
         document.getElementById('profileName').value = user.name;
@@ -324,7 +442,7 @@ async function updateProfile() {
     try {
         const response = await fetch(`${API_BASE_URL}/profile/${currentUserId}`, {
             method: 'PUT',
-            headers: { 'Content-Type': 'application/json' },
+            headers: authHeaders({ 'Content-Type': 'application/json' }),
             body: JSON.stringify({
                 surname: surname || undefined,
                 name: name || undefined,
@@ -359,8 +477,13 @@ function checkAuth(callback) {
 }
 
 function logout() {
+    if (authToken) {
+        fetch(`${API_BASE_URL}/auth/logout`, { method: 'POST', headers: authHeaders() })
+            .catch(error => console.error('Error signing out:', error));
+    }
     currentUserId = null;
     currentUserName = null;
+    authToken = null;
     isAuthenticated = false;
     document.getElementById('authHeader').style.display = 'none';
     showPage('registerPage');
@@ -405,19 +528,7 @@ async function loadProfileRegistrations() {
     if (!currentUserId) return;
 
     try {
-        console.log('Loading registrations for user:', currentUserId);
-
-        const response = await fetch(`${API_BASE_URL}/registrations/user/${currentUserId}`);
-
-        console.log('Response:', response.status);
-
-        if (!response.ok) {
-            console.error('Response error:', response.statusText);
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const registrations = await response.json();
-        console.log('Loaded registrations:', registrations);
+        const { registrations } = await loadDashboard();
 
         const registrationsList = document.getElementById('profileRegistrationsList');
         registrationsList.innerHTML = '';
@@ -455,8 +566,7 @@ async function loadProfileEvents() {
     if (!currentUserId) return;
 
     try {
-        const response = await fetch(`${API_BASE_URL}/events/user/${currentUserId}`);
-        const events = await response.json();
+        const { events } = await loadDashboard();
 
         const eventsList = document.getElementById('profileEventsList');
         eventsList.innerHTML = '';
@@ -548,7 +658,7 @@ async function saveEventChanges(e) {
     try {
         const response = await fetch(`${API_BASE_URL}/events/${window.currentEditingEventId}`, {
             method: 'PUT',
-            headers: { 'Content-Type': 'application/json' },
+            headers: authHeaders({ 'Content-Type': 'application/json' }),
             body: JSON.stringify({
                 title,
                 description,
@@ -571,20 +681,10 @@ async function saveEventChanges(e) {
         document.getElementById('editEventForm').reset();
         window.currentEditingEventId = null;
 
-        // Wait for a small delay before updating
-        await new Promise(resolve => setTimeout(resolve, 500));
-
-        // Return to profile
+        // Return to profile (the tab reloads the dashboard)
         showPage('profilePage');
-
-        // Wait for page to be ready
-        await new Promise(resolve => setTimeout(resolve, 100));
-
         showProfileTab('myEvents');
-
-        // Load data
-        await loadProfileEvents();
-        await loadEvents();
+        loadEvents(); // Update main page
     } catch (error) {
         console.error('Error:', error);
         alert('Error saving event: ' + error.message);
@@ -598,7 +698,8 @@ async function deleteProfileEvent(eventId) {
 
     try {
         const response = await fetch(`${API_BASE_URL}/events/${eventId}`, {
-            method: 'DELETE'
+            method: 'DELETE',
+            headers: authHeaders()
         });
 
         if (!response.ok) {
@@ -623,13 +724,8 @@ async function loadEventCalendar() {
     if (!currentUserId) return;
 
     try {
-        // Load events the user is registered for
-        const registrationsResponse = await fetch(`${API_BASE_URL}/registrations/user/${currentUserId}`);
-        const registrations = await registrationsResponse.json();
-
-        // Load events organized by the user
-        const myEventsResponse = await fetch(`${API_BASE_URL}/events/user/${currentUserId}`);
-        const myEvents = await myEventsResponse.json();
+        // Events the user is registered for and events organized by the user
+        const { registrations, events: myEvents } = await loadDashboard();
 
         // Create calendar events
         const calendarEvents = [];